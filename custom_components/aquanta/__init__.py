@@ -6,15 +6,36 @@ https://github.com/bmcclure/ha-aquanta
 
 from __future__ import annotations
 
+from datetime import timedelta
+
 from aquanta import Aquanta
+import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryAuthFailed
-
-from .const import DOMAIN
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import ConfigEntryAuthFailed, HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+import homeassistant.util.dt as dt_util
+
+from .api import AquantaApiClient
+from .capture import AquantaRecorder
+from .const import (
+    ATTR_CYCLES,
+    CONF_STALE_GRACE,
+    DATA_SESSIONS,
+    DEFAULT_STALE_GRACE,
+    DOMAIN,
+    REQUEST_TIMEOUT,
+    SERVICE_CAPTURE,
+    SERVICE_PROFILE,
+)
 from .coordinator import AquantaCoordinator
+from .executor import AquantaExecutor
+from .forecast import AquantaForecaster
+from .profiler import AquantaProfiler
+from .timeline import AquantaTimeline
 
 PLATFORMS: list[Platform] = [
     Platform.BINARY_SENSOR,
@@ -23,45 +44,140 @@ PLATFORMS: list[Platform] = [
     Platform.WATER_HEATER,
 ]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+CYCLES_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CYCLES, default=1): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=100)
+        ),
+    }
+)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Register the integration services."""
+
+    def loaded_coordinators() -> list[AquantaCoordinator]:
+        """Return the coordinators of the loaded accounts."""
+        if not (coordinators := list(hass.data.get(DOMAIN, {}).values())):
+            raise HomeAssistantError("No Aquanta accounts are loaded")
+        return coordinators
+
+    async def async_profile(call: ServiceCall) -> None:
+        """Profile the next refresh cycles of every Aquanta account."""
+        profiler = AquantaProfiler(hass, call.data[ATTR_CYCLES])
+        for coordinator in loaded_coordinators():
+            profiler.attach(coordinator)
+
+    async def async_capture(call: ServiceCall) -> None:
+        """Record the API responses of the next refresh cycles to files."""
+        timestamp = dt_util.utcnow().strftime("%Y%m%d%H%M%S")
+        for coordinator in loaded_coordinators():
+            coordinator.api.recorder = AquantaRecorder(
+                hass.config.path(
+                    f"aquanta_capture.{coordinator.config_entry.entry_id}"
+                    f".{timestamp}.json"
+                ),
+                call.data[ATTR_CYCLES],
+            )
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, async_profile, schema=CYCLES_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_CAPTURE, async_capture, schema=CYCLES_SCHEMA
+    )
+
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up this integration using UI."""
 
-    try:
-        aquanta = await hass.async_add_executor_job(
-            Aquanta, entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD]
-        )
-    except RuntimeError as err:
-        raise ConfigEntryAuthFailed(err) from err
-
+    executor = AquantaExecutor(hass)
+
+    # Reuse the session the config flow just logged in with, if any
+    aquanta = hass.data.get(DATA_SESSIONS, {}).pop(entry.data[CONF_USERNAME], None)
+
+    if aquanta is None:
+        try:
+            aquanta = await executor.async_run(
+                Aquanta,
+                entry.data[CONF_USERNAME],
+                entry.data[CONF_PASSWORD],
+                REQUEST_TIMEOUT,
+            )
+        except RuntimeError as err:
+            await executor.async_shutdown()
+            raise ConfigEntryAuthFailed(err) from err
+
+    timeline = AquantaTimeline(hass, entry.entry_id)
+    await timeline.async_load()
+    forecaster = AquantaForecaster(hass, entry.entry_id)
+    await forecaster.async_load()
+
+    api = AquantaApiClient(
+        aquanta, entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD]
+    )
     coordinator = AquantaCoordinator(
         hass,
         aquanta,
         entry.data[CONF_USERNAME],
+        executor,
+        api,
+        timedelta(
+            minutes=entry.options.get(
+                CONF_STALE_GRACE, DEFAULT_STALE_GRACE.total_seconds() / 60
+            )
+        ),
+        timeline,
+        forecaster,
     )
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
 
-    await coordinator.async_config_entry_first_refresh()
+    try:
+        await coordinator.async_config_entry_first_refresh()
+    except Exception:
+        hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.async_shutdown()
+        raise
 
     if entry.unique_id is None:
-        await hass.config_entries.async_update_entry(
+        hass.config_entries.async_update_entry(
             entry, unique_id=entry.data[CONF_USERNAME]
         )
 
+    entry.async_on_unload(coordinator.async_start_token_refresh())
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
+    entry.async_create_background_task(
+        hass,
+        forecaster.async_seed(
+            coordinator.account_id, list(coordinator.data["devices"])
+        ),
+        "aquanta forecast history",
+    )
+
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Handle removal of an entry."""
     if unloaded := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.async_shutdown()
     return unloaded
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the stored data of a removed entry."""
+    await AquantaTimeline(hass, entry.entry_id).async_remove()
+    await AquantaForecaster(hass, entry.entry_id).async_remove()
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+    await hass.config_entries.async_reload(entry.entry_id)
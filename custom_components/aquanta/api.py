@@ -0,0 +1,146 @@
+"""Blocking transport for the Aquanta cloud API."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from http import HTTPStatus
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from aquanta import Aquanta
+from aquanta.aquanta import AquantaHelper
+import homeassistant.util.dt as dt_util
+import requests
+
+if TYPE_CHECKING:
+    from .capture import AquantaRecorder
+
+# Snapshot key -> Aquanta device endpoint
+ENDPOINTS = {
+    "water": "water",
+    "info": "infocenter",
+    "advanced": "advanced",
+}
+
+
+class AquantaApiClient:
+    """Fetch undecoded endpoint payloads for the devices of an Aquanta account.
+
+    Given the account credentials, the client logs in again when its session
+    expires. Requests rejected as unauthorized wait on a single shared login
+    and are then retried once.
+    """
+
+    def __init__(
+        self,
+        aquanta: Aquanta,
+        username: str | None = None,
+        password: str | None = None,
+    ) -> None:
+        """Initialize the client around an authenticated Aquanta session."""
+        self.aquanta = aquanta
+        self.recorder: AquantaRecorder | None = None
+        self.authenticated_at: datetime = dt_util.utcnow()
+        self._username = username
+        self._password = password
+        self._login_lock = threading.Lock()
+
+    def device_ids(self) -> list:
+        """Return the IDs of the devices on the account."""
+        return list(self.aquanta.devices())
+
+    def fetch(self, aquanta_id, key: str) -> bytes:
+        """Return the raw response body of a device endpoint."""
+        start = time.monotonic()
+        resp = self._request("GET", f"/v2/devices/{aquanta_id}/{ENDPOINTS[key]}")
+
+        if self.recorder is not None:
+            self.recorder.record(
+                aquanta_id, key, resp.content, time.monotonic() - start
+            )
+
+        return resp.content
+
+    def set_set_point(self, aquanta_id, value: float) -> None:
+        """Set the thermostat set point of a device.
+
+        The advanced settings are written back whole with only the set point
+        changed, so the other settings they hold are left as they are.
+        """
+        path = f"/v2/devices/{aquanta_id}/{ENDPOINTS['advanced']}"
+        settings = self._request("GET", path).json()
+        settings["setPoint"] = value
+        self._request("PUT", path, json=settings)
+
+    def set_away(self, aquanta_id, start: str, end: str) -> None:
+        """Put a device in away mode between two UTC times."""
+        self._request(
+            "PUT", f"/v2/devices/{aquanta_id}/away", json={"start": start, "end": end}
+        )
+
+    def delete_away(self, aquanta_id) -> None:
+        """Take a device out of away mode."""
+        self._request("DELETE", f"/v2/devices/{aquanta_id}/away")
+
+    def set_boost(self, aquanta_id, start: str, end: str) -> None:
+        """Boost a device between two UTC times."""
+        self._request(
+            "PUT", f"/v2/devices/{aquanta_id}/boost", json={"start": start, "end": end}
+        )
+
+    def delete_boost(self, aquanta_id) -> None:
+        """Stop boosting a device."""
+        self._request("DELETE", f"/v2/devices/{aquanta_id}/boost")
+
+    def close(self) -> None:
+        """Close the session and the pooled connections it holds."""
+        # pylint: disable=protected-access
+        self.aquanta._session.close()
+
+    def relogin(self, expired: dict | None = None) -> None:
+        """Log in again, once for all callers that saw the same session expire.
+
+        ``expired`` is the headers a request was rejected with; if another
+        thread has replaced them in the meantime, its login is reused.
+        """
+        # pylint: disable=protected-access
+        if self._password is None:
+            raise RuntimeError(
+                "Aquanta: Session expired and no credentials to renew it"
+            )
+
+        with self._login_lock:
+            if expired is not None and self.aquanta._helper.headers is not expired:
+                return
+
+            self.aquanta._authenticate(self._username, self._password)
+            self.authenticated_at = dt_util.utcnow()
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Send a request, logging in again once if the session expired."""
+        # pylint: disable=protected-access
+        headers = self.aquanta._helper.headers
+        resp = self._send(method, path, headers, **kwargs)
+
+        if resp.status_code == HTTPStatus.UNAUTHORIZED and self._password is not None:
+            self.relogin(headers)
+            resp = self._send(method, path, self.aquanta._helper.headers, **kwargs)
+
+        if not resp.ok:
+            raise RuntimeError(f"Aquanta: Failed to {method} {path}, {resp}")
+
+        return resp
+
+    def _send(self, method: str, path: str, headers: dict, **kwargs):
+        # pylint: disable=protected-access
+        try:
+            return self.aquanta._session.request(
+                method,
+                AquantaHelper.API_BASE + path,
+                timeout=self.aquanta._timeout,
+                headers=headers,
+                **kwargs,
+            )
+        except requests.RequestException as err:
+            raise RuntimeError(f"Aquanta: Failed to {method} {path}, {err}") from err
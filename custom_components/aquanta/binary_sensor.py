@@ -2,91 +2,18 @@
 
 from __future__ import annotations
 
-from homeassistant.components.binary_sensor import (
-    BinarySensorEntity,
-    BinarySensorEntityDescription,
-)
+from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .entity import AquantaEntity
 from .const import DOMAIN, LOGGER
 from .coordinator import AquantaCoordinator
+from .fields import CompiledField, platform_fields
 
-ENTITY_DESCRIPTIONS = (
-    {
-        "desc": BinarySensorEntityDescription(
-            key="control_enabled",
-            name="Control enabled",
-            entity_category=EntityCategory.DIAGNOSTIC,
-        ),
-        "is_on": lambda entity: entity.coordinator.data["devices"][entity.aquanta_id][
-            "advanced"
-        ]["controlEnabled"],
-    },
-    {
-        "desc": BinarySensorEntityDescription(
-            key="intelligence_enabled",
-            name="Intelligence enabled",
-            entity_category=EntityCategory.DIAGNOSTIC,
-        ),
-        "is_on": lambda entity: (
-            entity.coordinator.data["devices"][entity.aquanta_id]["advanced"][
-                "controlEnabled"
-            ]
-            and entity.coordinator.data["devices"][entity.aquanta_id]["advanced"][
-                "intelEnabled"
-            ]
-        ),
-    },
-    {
-        "desc": BinarySensorEntityDescription(
-            key="thermostat_enabled",
-            name="Thermostat enabled",
-            entity_category=EntityCategory.DIAGNOSTIC,
-        ),
-        "is_on": lambda entity: (
-            entity.coordinator.data["devices"][entity.aquanta_id]["advanced"][
-                "controlEnabled"
-            ]
-            and entity.coordinator.data["devices"][entity.aquanta_id]["advanced"][
-                "thermostatEnabled"
-            ]
-        ),
-    },
-    {
-        "desc": BinarySensorEntityDescription(
-            key="time_of_use_enabled",
-            name="Time-of-use enabled",
-            entity_category=EntityCategory.DIAGNOSTIC,
-        ),
-        "is_on": lambda entity: (
-            entity.coordinator.data["devices"][entity.aquanta_id]["advanced"][
-                "controlEnabled"
-            ]
-            and entity.coordinator.data["devices"][entity.aquanta_id]["advanced"][
-                "touEnabled"
-            ]
-        ),
-    },
-    {
-        "desc": BinarySensorEntityDescription(
-            key="timer_enabled",
-            name="Timer enabled",
-            entity_category=EntityCategory.DIAGNOSTIC,
-        ),
-        "is_on": lambda entity: (
-            entity.coordinator.data["devices"][entity.aquanta_id]["advanced"][
-                "controlEnabled"
-            ]
-            and entity.coordinator.data["devices"][entity.aquanta_id]["advanced"][
-                "timerEnabled"
-            ]
-        ),
-    },
-)
+ENTITY_DESCRIPTIONS = platform_fields(Platform.BINARY_SENSOR)
 
 
 async def async_setup_entry(
@@ -100,12 +27,8 @@ async def async_setup_entry(
     entities: list[AquantaBinarySensor] = []
 
     for aquanta_id in coordinator.data["devices"]:
-        for entity_info in ENTITY_DESCRIPTIONS:
-            entities.append(
-                AquantaBinarySensor(
-                    coordinator, aquanta_id, entity_info["desc"], entity_info["is_on"]
-                )
-            )
+        for compiled in ENTITY_DESCRIPTIONS:
+            entities.append(AquantaBinarySensor(coordinator, aquanta_id, compiled))
 
     async_add_entities(entities)
 
@@ -119,16 +42,15 @@ class AquantaBinarySensor(AquantaEntity, BinarySensorEntity):
         self,
         coordinator: AquantaCoordinator,
         aquanta_id,
-        entity_description: BinarySensorEntityDescription,
-        is_on_func,
+        compiled: CompiledField,
     ) -> None:
         """Initialize the binary sensor."""
-        super().__init__(coordinator, aquanta_id)
-        self.entity_description = entity_description
-        self._is_on_func = is_on_func
-        self._attr_name = entity_description.name
+        super().__init__(coordinator, aquanta_id, compiled.endpoints)
+        self.entity_description = compiled.field.description
+        self._is_on_func = compiled.value
+        self._attr_name = self.entity_description.name
         self._attr_should_poll = True
-        self._attr_unique_id = self._base_unique_id + "_" + entity_description.key
+        self._attr_unique_id = self._base_unique_id + "_" + self.entity_description.key
         LOGGER.debug("Created binary sensor with unique ID %s", self._attr_unique_id)
 
     @property
@@ -141,4 +63,4 @@ class AquantaBinarySensor(AquantaEntity, BinarySensorEntity):
     @property
     def is_on(self):
         """Return true if the binary sensor is on."""
-        return self._is_on_func(self)
+        return self._is_on_func(self.device_data)
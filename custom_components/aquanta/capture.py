@@ -0,0 +1,167 @@
+"""Record and replay Aquanta API traffic for offline benchmarking."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+import json
+import math
+import threading
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .const import LOGGER
+
+REDACTED = "**REDACTED**"
+
+# Payload keys that may identify the account holder or their home
+TO_REDACT = {
+    "address",
+    "city",
+    "email",
+    "latitude",
+    "longitude",
+    "mac",
+    "macAddress",
+    "name",
+    "postalCode",
+    "serial",
+    "serialNumber",
+    "title",
+    "zip",
+}
+
+CAPTURE_VERSION = 1
+
+
+def _redact(data: Any) -> Any:
+    """Return a copy of a decoded payload with identifying values replaced."""
+    if isinstance(data, dict):
+        return {
+            key: REDACTED if key in TO_REDACT else _redact(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [_redact(item) for item in data]
+    return data
+
+
+class AquantaRecorder:
+    """Record redacted endpoint responses and their timings.
+
+    Attached to an AquantaApiClient, it is fed every response fetched during
+    the next refresh cycles. Device IDs are replaced with their position on
+    the account.
+    """
+
+    def __init__(self, path: str, cycles: int) -> None:
+        """Initialize the recorder."""
+        self.path = path
+        self._cycles = cycles
+        self._cycle = 0
+        self._start = time.monotonic()
+        self._devices: dict[Any, int] = {}
+        self._responses: list[dict] = []
+        self._lock = threading.Lock()
+
+    def record(self, aquanta_id, key: str, raw: bytes, elapsed: float) -> None:
+        """Record a response fetched by the client."""
+        with self._lock:
+            device = self._devices.setdefault(aquanta_id, len(self._devices) + 1)
+            self._responses.append(
+                {
+                    "cycle": self._cycle,
+                    "offset": round(time.monotonic() - self._start, 6),
+                    "device": device,
+                    "endpoint": key,
+                    "elapsed": round(elapsed, 6),
+                    "body": _redact(json.loads(raw)),
+                }
+            )
+
+    def end_cycle(self) -> bool:
+        """Mark a refresh cycle as done and return whether recording is over."""
+        self._cycle += 1
+        return self._cycle >= self._cycles
+
+    async def async_write(self, hass: HomeAssistant) -> None:
+        """Write the recording to its file."""
+        await hass.async_add_executor_job(self._write)
+        LOGGER.warning(
+            "Aquanta capture of %s responses written to %s",
+            len(self._responses),
+            self.path,
+        )
+
+    def _write(self) -> None:
+        with open(self.path, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "version": CAPTURE_VERSION,
+                    "recorded": dt_util.utcnow().isoformat(),
+                    "cycles": self._cycle,
+                    "responses": self._responses,
+                },
+                file,
+            )
+
+
+class AquantaReplayClient:
+    """Serve a recording in place of the Aquanta cloud.
+
+    Responses are returned in the order they were recorded for each device
+    endpoint, after sleeping for the recorded response time divided by
+    ``speed``; ``math.inf`` replays without delay. The recording loops once
+    exhausted so it can drive any number of refresh cycles.
+    """
+
+    recorder = None
+
+    def __init__(self, path: str, speed: float = 1.0) -> None:
+        """Load a recording."""
+        with open(path, encoding="utf-8") as file:
+            capture = json.load(file)
+
+        if capture.get("version") != CAPTURE_VERSION:
+            raise ValueError(f"Unsupported Aquanta capture version in {path}")
+
+        self._speed = speed
+        self._responses: dict[tuple, list[tuple[bytes, float]]] = defaultdict(list)
+        for response in capture["responses"]:
+            self._responses[(response["device"], response["endpoint"])].append(
+                (json.dumps(response["body"]).encode(), response["elapsed"])
+            )
+
+        self._devices = list(dict.fromkeys(device for device, _ in self._responses))
+        self._positions: dict[tuple, int] = defaultdict(int)
+
+    def device_ids(self) -> list:
+        """Return the devices present in the recording."""
+        return list(self._devices)
+
+    def fetch(self, aquanta_id, key: str) -> bytes:
+        """Return the next recorded response of a device endpoint."""
+        responses = self._responses[(aquanta_id, key)]
+        if not responses:
+            raise RuntimeError(f"Aquanta: No recorded {key} responses for {aquanta_id}")
+
+        position = self._positions[(aquanta_id, key)]
+        self._positions[(aquanta_id, key)] = (position + 1) % len(responses)
+        raw, elapsed = responses[position]
+
+        if self._speed != math.inf:
+            time.sleep(elapsed / self._speed)
+
+        return raw
+
+    def close(self) -> None:
+        """Release nothing, a recording holds no connections."""
+
+    def _refuse_write(self, *args) -> None:
+        """Refuse writes, a recording cannot change."""
+        raise RuntimeError("Aquanta: Replayed devices cannot be controlled")
+
+    set_set_point = _refuse_write
+    set_away = delete_away = set_boost = delete_boost = _refuse_write
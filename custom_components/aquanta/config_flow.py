@@ -11,11 +11,21 @@ from homeassistant import config_entries
 from homeassistant import data_entry_flow
 from homeassistant.components.dhcp import DhcpServiceInfo
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import selector
 
-from .const import DOMAIN, LOGGER
+from .const import (
+    CONF_AUTO_BOOST,
+    CONF_SET_POINT_CONTROL,
+    CONF_STALE_GRACE,
+    DATA_SESSIONS,
+    DEFAULT_STALE_GRACE,
+    DOMAIN,
+    LOGGER,
+    REQUEST_TIMEOUT,
+)
 
 
 class AquantaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -23,6 +33,14 @@ class AquantaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return AquantaOptionsFlowHandler(config_entry)
+
     async def user_data_schema(self, user_input: dict[str, Any]):
         """Define a shared schema for user credentials."""
         return vol.Schema(
@@ -46,7 +64,7 @@ class AquantaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         _errors = {}
         if user_input is not None:
             try:
-                await self._test_credentials(user_input)
+                aquanta = await self._test_credentials(user_input)
             except AquantaCannotConnect as exception:
                 LOGGER.error(exception)
                 _errors["base"] = "connection"
@@ -58,8 +76,18 @@ class AquantaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 _errors["base"] = "unknown"
             else:
                 await self.async_set_unique_id(user_input[CONF_USERNAME])
-                self._abort_if_unique_id_configured(updates=user_input)
 
+                if self.source == config_entries.SOURCE_REAUTH:
+                    self._hand_over(user_input, aquanta)
+                    return self._async_reauth_entry(user_input)
+
+                try:
+                    self._abort_if_unique_id_configured(updates=user_input)
+                except data_entry_flow.AbortFlow:
+                    await self._async_close(aquanta)
+                    raise
+
+                self._hand_over(user_input, aquanta)
                 return self.async_create_entry(
                     title=user_input[CONF_USERNAME], data=user_input
                 )
@@ -83,6 +111,34 @@ class AquantaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             )
         return await self.async_step_user()
 
+    @callback
+    def _hand_over(self, user_input: dict[str, Any], aquanta: Aquanta) -> None:
+        """Hand a logged-in client over to the next setup of the entry.
+
+        The setup pops it instead of logging in again, so onboarding and
+        reauth each cost a single login.
+        """
+        self.hass.data.setdefault(DATA_SESSIONS, {})[
+            user_input[CONF_USERNAME]
+        ] = aquanta
+
+    @callback
+    def _async_reauth_entry(self, user_input: dict[str, Any]) -> FlowResult:
+        """Save the new credentials and set the entry up again with them."""
+        entry = self.hass.config_entries.async_get_entry(self.context["entry_id"])
+        updated = self.hass.config_entries.async_update_entry(
+            entry, data={**entry.data, **user_input}
+        )
+
+        # A loaded entry reloads itself when its data changes; otherwise,
+        # such as after a setup error, it has to be reloaded here.
+        if not updated or entry.state is not config_entries.ConfigEntryState.LOADED:
+            self.hass.async_create_task(
+                self.hass.config_entries.async_reload(entry.entry_id)
+            )
+
+        return self.async_abort(reason="reauth_successful")
+
     async def async_step_dhcp(
         self, discovery_info: DhcpServiceInfo
     ) -> data_entry_flow.FlowResult:
@@ -92,17 +148,70 @@ class AquantaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         return await self.async_step_user()
 
-    async def _test_credentials(self, data: dict[str, Any]) -> None:
-        """Log into Aquanta to validate the credentials."""
+    async def _test_credentials(self, data: dict[str, Any]) -> Aquanta:
+        """Log into Aquanta to validate the credentials.
+
+        Logging in only exchanges the password for an API token; the
+        authenticated client is returned for reuse by entry setup.
+        """
 
         try:
-            await self.hass.async_add_executor_job(
-                Aquanta, data[CONF_USERNAME], data[CONF_PASSWORD]
+            return await self.hass.async_add_executor_job(
+                Aquanta, data[CONF_USERNAME], data[CONF_PASSWORD], REQUEST_TIMEOUT
             )
-        except RuntimeError:
-            raise AquantaInvalidAuth from RuntimeError
+        except RuntimeError as err:
+            raise AquantaInvalidAuth from err
+
+    async def _async_close(self, aquanta: Aquanta) -> None:
+        """Close a logged-in client no entry setup is going to take over."""
+        # pylint: disable=protected-access
+        await self.hass.async_add_executor_job(aquanta._session.close)
 
-        return {"title": data[CONF_USERNAME], "data": data}
+
+class AquantaOptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle Aquanta options."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_STALE_GRACE,
+                        default=self.config_entry.options.get(
+                            CONF_STALE_GRACE, DEFAULT_STALE_GRACE.total_seconds() / 60
+                        ),
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=0,
+                            max=120,
+                            unit_of_measurement="min",
+                            mode=selector.NumberSelectorMode.BOX,
+                        )
+                    ),
+                    vol.Required(
+                        CONF_AUTO_BOOST,
+                        default=self.config_entry.options.get(CONF_AUTO_BOOST, False),
+                    ): selector.BooleanSelector(),
+                    vol.Required(
+                        CONF_SET_POINT_CONTROL,
+                        default=self.config_entry.options.get(
+                            CONF_SET_POINT_CONTROL, False
+                        ),
+                    ): selector.BooleanSelector(),
+                }
+            ),
+        )
 
 
 class AquantaCannotConnect(HomeAssistantError):
@@ -1,5 +1,6 @@
 """Constants for the Aquanta integration."""
 
+from datetime import timedelta
 from logging import Logger, getLogger
 
 LOGGER: Logger = getLogger(__package__)
@@ -8,3 +9,53 @@ NAME = "Aquanta"
 DOMAIN = "aquanta"
 MODEL = "Aquanta Water Heater Controller"
 ATTRIBUTION = ""
+
+# hass.data key for clients logged in by the config flow, keyed by username
+DATA_SESSIONS = f"{DOMAIN}_sessions"
+
+# Seconds an Aquanta request may wait to connect or for data
+REQUEST_TIMEOUT = 5
+# Seconds the endpoints of one device may take in a refresh; the ones left
+# when it runs out are skipped and count as failing
+DEVICE_FETCH_DEADLINE = 8
+# Seconds a whole refresh may take, on top of the time allowed per device
+REFRESH_TIMEOUT = 10
+
+# Worker threads dedicated to the blocking Aquanta client, per config entry
+EXECUTOR_MAX_WORKERS = 2
+
+# Option for the minutes a device endpoint may fail before its entities go
+# unavailable; until then they keep showing its last data
+CONF_STALE_GRACE = "stale_grace"
+DEFAULT_STALE_GRACE = timedelta(minutes=5)
+
+# Option to boost devices ahead of a predicted hot water shortfall, how far
+# ahead, and how long after an automatic boost not to start another
+CONF_AUTO_BOOST = "auto_boost"
+AUTO_BOOST_LEAD = timedelta(hours=1)
+AUTO_BOOST_COOLDOWN = timedelta(hours=2)
+
+# Aquanta sessions last as long as the identity token they were made from
+TOKEN_LIFETIME = timedelta(hours=1)
+# How long before expiry a session is renewed, and how soon to retry on failure
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+TOKEN_RETRY_INTERVAL = timedelta(minutes=5)
+
+# Option to let the water heater change the set point. The Aquanta library
+# has no call for it, so it writes the advanced settings the set point is
+# read from, which is not verified to work on every device.
+CONF_SET_POINT_CONTROL = "set_point_control"
+
+# Seconds a target temperature must stay unchanged before it is sent
+SET_POINT_COOLDOWN = 2.0
+
+# Set point range offered by the water heater, 110-140 °F in °C
+SET_POINT_MIN = 43.5
+SET_POINT_MAX = 60.0
+
+# Hot water available percentage below which aquanta_hot_water_low fires
+HOT_WATER_LOW_PERCENT = 25
+
+SERVICE_CAPTURE = "capture"
+SERVICE_PROFILE = "profile"
+ATTR_CYCLES = "cycles"
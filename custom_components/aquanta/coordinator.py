@@ -2,17 +2,60 @@
 
 from __future__ import annotations
 
-from datetime import timedelta
+import asyncio
+from datetime import datetime, timedelta
+import hashlib
+import threading
+import time
+from typing import NamedTuple
+
 import async_timeout
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import ATTR_DEVICE_ID
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.event import async_call_later
+import homeassistant.util.dt as dt_util
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
 
-from .const import DOMAIN, LOGGER
+from .api import ENDPOINTS, AquantaApiClient
+from .const import (
+    DEFAULT_STALE_GRACE,
+    DEVICE_FETCH_DEADLINE,
+    DOMAIN,
+    LOGGER,
+    REFRESH_TIMEOUT,
+    REQUEST_TIMEOUT,
+    TOKEN_LIFETIME,
+    TOKEN_REFRESH_MARGIN,
+    TOKEN_RETRY_INTERVAL,
+)
+from .events import ATTR_AQUANTA_ID, EVENT_ENDPOINTS, diff_snapshots
+from .executor import AquantaExecutor
+from .forecast import AquantaForecaster
+from .fields import decode
+from .profiler import AquantaProfiler
+from .timeline import AquantaTimeline
+
+
+class FetchResult(NamedTuple):
+    """A snapshot fetched on the worker pool and what its fetch learned.
+
+    The event loop adopts all of it together, or none of it when the
+    snapshot is discarded.
+    """
+
+    data: dict
+    # Fingerprints of the payloads in data
+    fingerprints: dict[tuple, bytes]
+    # (device, endpoint) -> why it could not be fetched
+    failed: dict[tuple, Exception]
+    # (device, endpoint) fetched successfully
+    fetched: set[tuple]
 
 
 # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
@@ -21,33 +64,405 @@ class AquantaCoordinator(DataUpdateCoordinator):
 
     config_entry: ConfigEntry
 
-    def __init__(self, hass: HomeAssistant, aquanta, account_id) -> None:
-        """Initialize the coordinator."""
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        aquanta,
+        account_id,
+        executor: AquantaExecutor,
+        api: AquantaApiClient | None = None,
+        stale_grace: timedelta = DEFAULT_STALE_GRACE,
+        timeline: AquantaTimeline | None = None,
+        forecaster: AquantaForecaster | None = None,
+    ) -> None:
+        """Initialize the coordinator.
+
+        A different client, such as a capture replay, can be passed as api.
+        Entities stay available on the last data of a failing endpoint for
+        stale_grace before going unavailable. Each successful refresh records
+        the device modes in timeline and samples the hot water available for
+        forecaster, if given.
+        """
         self.aquanta = aquanta
+        self.executor = executor
+        self.api = api or AquantaApiClient(aquanta)
         self.account_id = account_id
+        # Fingerprints of the payloads in self.data, only ever replaced with it
+        self._fingerprints: dict[tuple, bytes] = {}
+        self._fetch_lock = asyncio.Lock()
+        # Set on shutdown so fetches running on the worker pool stop early
+        self._stopping = threading.Event()
+        self._fingerprint_hits = 0
+        self._fingerprint_misses = 0
+        self.profiler: AquantaProfiler | None = None
+        self._unsub_token_refresh: CALLBACK_TYPE | None = None
+        self.stale_grace = stale_grace
+        self.timeline = timeline
+        self.forecaster = forecaster
+        # (device, endpoint) -> when it started failing, and those past grace
+        self._failures: dict[tuple, datetime] = {}
+        self._stale: frozenset[tuple] = frozenset()
         super().__init__(
             hass=hass,
             logger=LOGGER,
             name=DOMAIN,
             update_interval=timedelta(seconds=60),
+            # get_device_data returns the previous snapshot object when no
+            # payload changed, so this comparison is an identity check.
+            always_update=False,
+        )
+
+    def fetch_plan(self) -> dict | None:
+        """Return the endpoints the enabled entities of each device need.
+
+        Entities register the endpoints they read as their listener context,
+        so disabling an entity removes its needs from the plan. The events,
+        timeline and forecaster read their endpoints of every device whatever
+        entities are enabled. None means no entity is listening yet and
+        everything should be fetched.
+        """
+        plan: dict = {}
+
+        for aquanta_id, endpoints in self.async_contexts():
+            plan.setdefault(aquanta_id, set()).update(endpoints)
+
+        if not plan:
+            return None
+
+        consumed = set(EVENT_ENDPOINTS)
+        if self.timeline is not None:
+            consumed.update(self.timeline.endpoints)
+        if self.forecaster is not None:
+            consumed.update(self.forecaster.endpoints)
+
+        # Devices not in the snapshot yet are fetched whole
+        for aquanta_id in self.data["devices"] if self.data else ():
+            plan.setdefault(aquanta_id, set()).update(consumed)
+
+        return plan
+
+    def get_device_data(self, plan: dict | None = None) -> FetchResult:
+        """Get all data from the Aquanta API for each device.
+
+        Only the endpoints in the fetch plan are requested; the others keep
+        their previous payload. Each endpoint response is fingerprinted;
+        unchanged responses are not decoded and unchanged devices keep their
+        previous snapshot object.
+
+        Once there is a snapshot, a failed endpoint keeps its previous
+        payload and is recorded as failing instead of failing the refresh; a
+        new device that fails is left out until it can be fetched. Endpoints
+        of a device still to fetch when its DEVICE_FETCH_DEADLINE has passed
+        fail without being requested, so a device that hangs costs about one
+        request timeout instead of one per endpoint. Shutting down stops the
+        fetch after the request in flight.
+
+        Nothing on the coordinator is changed here; the result is adopted
+        on the event loop by _async_adopt together with the snapshot.
+        """
+        previous = self.data["devices"] if self.data else {}
+        previous_fingerprints = self._fingerprints
+        devices = {}
+        fingerprints = {}
+        failed: dict[tuple, Exception] = {}
+        fetched: set[tuple] = set()
+        changed = False
+
+        for aquanta_id in self.api.device_ids():
+            old_device = previous.get(aquanta_id)
+            device_changed = old_device is None
+
+            if plan is None or old_device is None:
+                keys = ENDPOINTS
+                device = {}
+                digests = {}
+            else:
+                keys = plan.get(aquanta_id, ())
+                device = dict(old_device)
+                digests = {
+                    key: previous_fingerprints.get((aquanta_id, key))
+                    for key in ENDPOINTS
+                }
+
+            deadline = time.monotonic() + DEVICE_FETCH_DEADLINE
+
+            for key in keys:
+                if self._stopping.is_set():
+                    raise RuntimeError("Aquanta: Fetch stopped by shutdown")
+
+                try:
+                    if time.monotonic() > deadline:
+                        raise RuntimeError(
+                            f"Aquanta: Skipped {key} of {aquanta_id}, the device"
+                            f" took over {DEVICE_FETCH_DEADLINE}s"
+                        )
+                    raw = self.api.fetch(aquanta_id, key)
+                except RuntimeError as exception:
+                    if not previous:
+                        raise
+                    failed[(aquanta_id, key)] = exception
+                    if old_device is None:
+                        break
+                    continue
+
+                fetched.add((aquanta_id, key))
+                digest = hashlib.blake2b(raw, digest_size=16).digest()
+
+                if old_device is not None and digests.get(key) == digest:
+                    self._fingerprint_hits += 1
+                    device[key] = old_device[key]
+                else:
+                    self._fingerprint_misses += 1
+                    digests[key] = digest
+                    device[key] = decode(key, raw)
+                    device_changed = True
+
+            if device.keys() != ENDPOINTS.keys():
+                continue
+
+            devices[aquanta_id] = device if device_changed else old_device
+            fingerprints.update(
+                ((aquanta_id, key), digest)
+                for key, digest in digests.items()
+                if digest is not None
+            )
+            changed = changed or device_changed
+
+        if not changed and self.data and devices.keys() == previous.keys():
+            return FetchResult(self.data, previous_fingerprints, failed, fetched)
+
+        return FetchResult(
+            {"id": self.account_id, "devices": devices}, fingerprints, failed, fetched
+        )
+
+    @callback
+    def _async_adopt(self, result: FetchResult) -> None:
+        """Adopt what a fetch learned along with its snapshot."""
+        self._fingerprints = result.fingerprints
+
+        for aquanta_id, key in result.fetched:
+            if self._failures.pop((aquanta_id, key), None) is not None:
+                LOGGER.info("Fetching %s of %s recovered", key, aquanta_id)
+        for (aquanta_id, key), exception in result.failed.items():
+            self._record_failure(aquanta_id, key, exception)
+
+    def _record_failure(self, aquanta_id, key: str, exception: Exception) -> None:
+        """Record that an endpoint of a device could not be fetched."""
+        if (aquanta_id, key) not in self._failures:
+            LOGGER.warning(
+                "Failed to fetch %s of %s, keeping its last data: %s",
+                key,
+                aquanta_id,
+                exception,
+            )
+            self._failures[(aquanta_id, key)] = dt_util.utcnow()
+
+    def is_fresh(self, aquanta_id, endpoints) -> bool:
+        """Return whether a device's endpoints have data within the grace period."""
+        return not any((aquanta_id, key) in self._stale for key in endpoints)
+
+    def endpoint_failures(self) -> dict[tuple, datetime]:
+        """Return when each failing device endpoint started failing."""
+        return dict(self._failures)
+
+    @callback
+    def _async_update_stale(self) -> None:
+        """Update the endpoints past grace, notifying listeners if they changed."""
+        now = dt_util.utcnow()
+        stale = frozenset(
+            failure
+            for failure, since in self._failures.items()
+            if now - since >= self.stale_grace
         )
 
-    def get_device_data(self):
-        """Get all data from the Aquanta API for each device."""
-        data = {"id": self.account_id, "devices": {}}
+        if stale != self._stale:
+            self._stale = stale
+            self.async_update_listeners()
+
+    def fingerprint_stats(self) -> dict:
+        """Return payload fingerprint cache statistics."""
+        total = self._fingerprint_hits + self._fingerprint_misses
+        return {
+            "hits": self._fingerprint_hits,
+            "misses": self._fingerprint_misses,
+            "hit_rate": self._fingerprint_hits / total if total else None,
+        }
+
+    async def _async_refresh(self, *args, **kwargs) -> None:
+        """Refresh data, under the profiler if one is attached."""
+        if self.profiler is None:
+            await self._async_refresh_cycle(*args, **kwargs)
+        else:
+            await self.profiler.async_profile_refresh(
+                self, self._async_refresh_cycle(*args, **kwargs)
+            )
+
+    async def _async_refresh_cycle(self, *args, **kwargs) -> None:
+        """Refresh data and feed it to the coordinator-level consumers."""
+        await super()._async_refresh(*args, **kwargs)
 
-        for aquanta_id in self.aquanta.devices():
-            data["devices"][aquanta_id] = {
-                "water": self.aquanta[aquanta_id].water,
-                "info": self.aquanta[aquanta_id].infocenter,
-                "advanced": self.aquanta[aquanta_id].advanced,
-            }
+        self._async_update_stale()
 
-        return data
+        if not self.last_update_success:
+            return
+        if self.timeline is not None:
+            self.timeline.async_update(self.data, self._failures)
+        if self.forecaster is not None:
+            self.forecaster.async_update(self.data, self._failures)
 
     async def _async_update_data(self):
+        # Serialized with targeted refreshes so each builds on the last
+        async with self._fetch_lock:
+            try:
+                async with async_timeout.timeout(self._refresh_timeout()):
+                    if self.profiler is not None:
+                        result = await self.executor.async_run(
+                            self.profiler.run_job,
+                            self.get_device_data,
+                            self.fetch_plan(),
+                        )
+                    else:
+                        result = await self.executor.async_run(
+                            self.get_device_data, self.fetch_plan()
+                        )
+            except RuntimeError as exception:
+                raise UpdateFailed(exception) from exception
+
+            self._async_fire_events(result.data)
+
+            if (recorder := self.api.recorder) is not None and recorder.end_cycle():
+                self.api.recorder = None
+                self.hass.async_create_background_task(
+                    recorder.async_write(self.hass), "aquanta capture"
+                )
+
+            # The caller assigns data to self.data without yielding
+            self._async_adopt(result)
+            return result.data
+
+    def _refresh_timeout(self) -> float:
+        """Return how long a refresh may take, allowing for every device.
+
+        A device may take its fetch deadline plus the request in flight when
+        it passed, so one slow device cannot time out the whole account.
+        """
+        devices = len(self.data["devices"]) if self.data else 0
+        return REFRESH_TIMEOUT + max(devices, 1) * (
+            DEVICE_FETCH_DEADLINE + REQUEST_TIMEOUT
+        )
+
+    async def async_refresh_device(self, aquanta_id, endpoints) -> None:
+        """Fetch some endpoints of one device outside the refresh schedule.
+
+        Used to confirm a change made to a device without waiting for, or
+        moving, the next scheduled refresh of the whole account.
+        """
+        async with self._fetch_lock:
+            try:
+                result = await self.executor.async_run(
+                    self.get_device_data, {aquanta_id: set(endpoints)}
+                )
+            except RuntimeError as exception:
+                LOGGER.debug(
+                    "Targeted refresh of %s failed: %s", aquanta_id, exception
+                )
+                return
+
+            self._async_adopt(result)
+            if result.data is not self.data:
+                self._async_fire_events(result.data)
+                self.data = result.data
+                self.async_update_listeners()
+
+        self._async_update_stale()
+
+    @callback
+    def _async_fire_events(self, data: dict) -> None:
+        """Fire the transition events between the current and a new snapshot."""
+        device_registry = dr.async_get(self.hass)
+
+        for event_type, aquanta_id, event_data in diff_snapshots(self.data, data):
+            device = device_registry.async_get_device(
+                identifiers={(DOMAIN, f"{self.account_id}_{aquanta_id}")}
+            )
+            self.hass.bus.async_fire(
+                event_type,
+                {
+                    ATTR_DEVICE_ID: device.id if device else None,
+                    ATTR_AQUANTA_ID: aquanta_id,
+                    **event_data,
+                },
+            )
+
+    @callback
+    def async_start_token_refresh(self) -> CALLBACK_TYPE:
+        """Renew the session in the background before it expires.
+
+        Returns a callback that stops the renewals.
+        """
+
+        @callback
+        def stop() -> None:
+            if self._unsub_token_refresh is not None:
+                self._unsub_token_refresh()
+                self._unsub_token_refresh = None
+
+        self._async_schedule_token_refresh()
+        return stop
+
+    @callback
+    def _async_schedule_token_refresh(self, delay: timedelta | None = None) -> None:
+        if self._shutdown_requested:
+            return
+        if delay is None:
+            delay = (
+                self.api.authenticated_at
+                + TOKEN_LIFETIME
+                - TOKEN_REFRESH_MARGIN
+                - dt_util.utcnow()
+            )
+        self._unsub_token_refresh = async_call_later(
+            self.hass, max(delay, timedelta(0)), self._async_refresh_token
+        )
+
+    async def _async_refresh_token(self, _now: datetime) -> None:
+        """Log in again if the session is about to expire."""
+        # A request may have renewed the session since this was scheduled
+        if dt_util.utcnow() < (
+            self.api.authenticated_at + TOKEN_LIFETIME - TOKEN_REFRESH_MARGIN
+        ):
+            self._async_schedule_token_refresh()
+            return
+
         try:
-            async with async_timeout.timeout(10):
-                return await self.hass.async_add_executor_job(self.get_device_data)
+            await self.executor.async_run(self.api.relogin)
         except RuntimeError as exception:
-            raise UpdateFailed(exception) from exception
+            LOGGER.warning("Failed to renew the Aquanta session: %s", exception)
+            self._async_schedule_token_refresh(TOKEN_RETRY_INTERVAL)
+            return
+
+        self._async_schedule_token_refresh()
+
+    async def async_shutdown(self) -> None:
+        """Release everything the coordinator holds.
+
+        Refreshes and session renewals stop, what was learned is saved,
+        in-flight fetches are cancelled and the worker pool is shut down,
+        then the session and its pooled connections are closed.
+
+        The config entry also calls this on unload, so only the first call
+        does anything.
+        """
+        if self._shutdown_requested:
+            return
+        self._stopping.set()
+        await super().async_shutdown()
+        if self._unsub_token_refresh is not None:
+            self._unsub_token_refresh()
+            self._unsub_token_refresh = None
+        if self.timeline is not None:
+            await self.timeline.async_save()
+        if self.forecaster is not None:
+            await self.forecaster.async_save()
+        await self.executor.async_shutdown()
+        await self.hass.async_add_executor_job(self.api.close)
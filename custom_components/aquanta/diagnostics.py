@@ -0,0 +1,36 @@
+"""Diagnostics support for Aquanta."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import AquantaCoordinator
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME, "title", "unique_id"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: AquantaCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "fingerprints": coordinator.fingerprint_stats(),
+        "executor": coordinator.executor.stats(),
+        "fetch_plan": {
+            str(aquanta_id): sorted(endpoints)
+            for aquanta_id, endpoints in (coordinator.fetch_plan() or {}).items()
+        },
+        "endpoint_failures": {
+            f"{aquanta_id}.{key}": since.isoformat()
+            for (aquanta_id, key), since in coordinator.endpoint_failures().items()
+        },
+    }
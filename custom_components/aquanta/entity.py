@@ -9,8 +9,14 @@ from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
 )
 
+from .api import ENDPOINTS
 from .const import ATTRIBUTION, DOMAIN, MODEL, NAME
 from .coordinator import AquantaCoordinator
+from .fields import COMPILED_FIELDS
+
+_TITLE = COMPILED_FIELDS["title"].value
+_AWAY = COMPILED_FIELDS["away"].value
+_BOOST = COMPILED_FIELDS["boost"].value
 
 
 class AquantaEntity(CoordinatorEntity):
@@ -18,12 +24,36 @@ class AquantaEntity(CoordinatorEntity):
 
     _attr_attribution = ATTRIBUTION
 
-    def __init__(self, coordinator: AquantaCoordinator, aquanta_id) -> None:
-        """Initialize the entity."""
-        super().__init__(coordinator)
+    def __init__(
+        self,
+        coordinator: AquantaCoordinator,
+        aquanta_id,
+        endpoints: frozenset[str] = frozenset(ENDPOINTS),
+    ) -> None:
+        """Initialize the entity.
+
+        The endpoints this entity reads are registered as its coordinator
+        context so the coordinator only fetches what enabled entities need.
+        """
+        super().__init__(coordinator, context=(aquanta_id, endpoints))
         self._base_unique_id = f"{coordinator.data['id']}_{aquanta_id}"
         self.aquanta_id = aquanta_id
-        self._api = coordinator.aquanta
+        self._endpoints = endpoints
+        self._api = coordinator.api
+
+    @property
+    def available(self) -> bool:
+        """Return if the device's endpoints this entity reads are fresh enough."""
+        return (
+            super().available
+            and self.aquanta_id in self.coordinator.data["devices"]
+            and self.coordinator.is_fresh(self.aquanta_id, self._endpoints)
+        )
+
+    @property
+    def device_data(self) -> dict:
+        """Return the latest snapshot of this entity's device."""
+        return self.coordinator.data["devices"][self.aquanta_id]
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -32,44 +62,31 @@ class AquantaEntity(CoordinatorEntity):
             identifiers={(DOMAIN, self._base_unique_id)},
             manufacturer=NAME,
             model=MODEL,
-            name=self.coordinator.data["devices"][self.aquanta_id]["info"]["title"],
+            name=_TITLE(self.device_data),
         )
 
     def device_name(self):
         """Get the device name from the latest API request."""
-        return self.coordinator.data["devices"][self.aquanta_id]["info"]["title"]
+        return _TITLE(self.device_data)
 
     @property
     def is_away_mode_on(self):
         """Return true if away mode is on."""
-        on_value = (
-            self.coordinator.data["devices"][self.aquanta_id]["info"]["currentMode"][
-                "type"
-            ]
-            == "away"
-        )
-
-        if not on_value:
-            for record in self.coordinator.data["devices"][self.aquanta_id]["info"][
-                "records"
-            ]:
-                if record["type"] == "away" and record["state"] == "ongoing":
-                    on_value = True
-                    break
-
-        return on_value
+        return _AWAY(self.device_data)
 
     async def async_turn_away_mode_on(self):
         """Turn away mode on."""
         schedule = self.get_away_schedule()
-        await self.hass.async_add_executor_job(
-            self._api[self.aquanta_id].set_away, schedule["start"], schedule["stop"]
+        await self.coordinator.executor.async_run(
+            self._api.set_away, self.aquanta_id, schedule["start"], schedule["stop"]
         )
         await self.coordinator.async_request_refresh()
 
     async def async_turn_away_mode_off(self):
         """Turn away mode off."""
-        await self.hass.async_add_executor_job(self._api[self.aquanta_id].delete_away)
+        await self.coordinator.executor.async_run(
+            self._api.delete_away, self.aquanta_id
+        )
         await self.coordinator.async_request_refresh()
 
     def get_away_schedule(self):
@@ -86,34 +103,21 @@ class AquantaEntity(CoordinatorEntity):
     @property
     def is_boost_mode_on(self):
         """Return true if boost mode is on."""
-        on_value = (
-            self.coordinator.data["devices"][self.aquanta_id]["info"]["currentMode"][
-                "type"
-            ]
-            == "boost"
-        )
-
-        if not on_value:
-            for record in self.coordinator.data["devices"][self.aquanta_id]["info"][
-                "records"
-            ]:
-                if record["type"] == "boost" and record["state"] == "ongoing":
-                    on_value = True
-                    break
-
-        return on_value
+        return _BOOST(self.device_data)
 
     async def async_turn_boost_mode_on(self, **kwargs):
         """Turn on boost mode."""
         schedule = self.get_boost_schedule()
-        await self.hass.async_add_executor_job(
-            self._api[self.aquanta_id].set_boost, schedule["start"], schedule["stop"]
+        await self.coordinator.executor.async_run(
+            self._api.set_boost, self.aquanta_id, schedule["start"], schedule["stop"]
         )
         await self.coordinator.async_request_refresh()
 
     async def async_turn_boost_mode_off(self, **kwargs):
         """Turn off boost mode."""
-        await self.hass.async_add_executor_job(self._api[self.aquanta_id].delete_boost)
+        await self.coordinator.executor.async_run(
+            self._api.delete_boost, self.aquanta_id
+        )
         await self.coordinator.async_request_refresh()
 
     def get_boost_schedule(self):
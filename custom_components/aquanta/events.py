@@ -0,0 +1,86 @@
+"""Events fired on transitions between consecutive device snapshots."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+import operator
+from typing import Any, NamedTuple
+
+from .const import DOMAIN, HOT_WATER_LOW_PERCENT
+from .fields import COMPILED_FIELDS
+
+EVENT_MODE_CHANGED = f"{DOMAIN}_mode_changed"
+EVENT_BOOST_ENDED = f"{DOMAIN}_boost_ended"
+EVENT_HOT_WATER_LOW = f"{DOMAIN}_hot_water_low"
+
+ATTR_AQUANTA_ID = "aquanta_id"
+ATTR_OLD_VALUE = "old_value"
+ATTR_NEW_VALUE = "new_value"
+
+
+class AquantaEvent(NamedTuple):
+    """An event fired when a field's value makes a transition."""
+
+    event_type: str
+    value: Callable[[dict], Any]
+    fires: Callable[[Any, Any], bool]
+    endpoints: frozenset[str]
+
+
+def _dropped_below(threshold: float) -> Callable[[Any, Any], bool]:
+    """Return a test for a value falling from at or above a threshold to below it."""
+
+    def fires(old, new) -> bool:
+        return old is not None and new is not None and old >= threshold > new
+
+    return fires
+
+
+EVENTS: tuple[AquantaEvent, ...] = (
+    AquantaEvent(
+        EVENT_MODE_CHANGED,
+        COMPILED_FIELDS["current_mode"].value,
+        operator.ne,
+        COMPILED_FIELDS["current_mode"].endpoints,
+    ),
+    AquantaEvent(
+        EVENT_BOOST_ENDED,
+        COMPILED_FIELDS["boost"].value,
+        lambda old, new: old and not new,
+        COMPILED_FIELDS["boost"].endpoints,
+    ),
+    AquantaEvent(
+        EVENT_HOT_WATER_LOW,
+        COMPILED_FIELDS["hot_water_available"].value,
+        _dropped_below(HOT_WATER_LOW_PERCENT),
+        COMPILED_FIELDS["hot_water_available"].endpoints,
+    ),
+)
+
+# Endpoints the events read from every device
+EVENT_ENDPOINTS = frozenset().union(*(event.endpoints for event in EVENTS))
+
+
+def diff_snapshots(old: dict | None, new: dict) -> Iterator[tuple[str, Any, dict]]:
+    """Yield the events between two account snapshots.
+
+    Devices that kept their snapshot object are unchanged and skipped, as are
+    devices that only appear in one of the snapshots.
+    """
+    if old is None or old is new:
+        return
+
+    previous = old["devices"]
+    for aquanta_id, device in new["devices"].items():
+        old_device = previous.get(aquanta_id)
+        if old_device is None or old_device is device:
+            continue
+
+        for event in EVENTS:
+            old_value = event.value(old_device)
+            new_value = event.value(device)
+            if event.fires(old_value, new_value):
+                yield event.event_type, aquanta_id, {
+                    ATTR_OLD_VALUE: old_value,
+                    ATTR_NEW_VALUE: new_value,
+                }
@@ -0,0 +1,106 @@
+"""Dedicated worker pool for blocking Aquanta calls."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import threading
+import time
+from typing import Any, TypeVar
+
+from homeassistant.core import HomeAssistant
+
+from .const import EXECUTOR_MAX_WORKERS
+
+_T = TypeVar("_T")
+
+
+class AquantaExecutor:
+    """Run blocking Aquanta calls on a small pool of worker threads.
+
+    Keeping the blocking client off Home Assistant's shared executor means a
+    slow Aquanta cloud can only back up this pool, not every other
+    integration.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, max_workers: int = EXECUTOR_MAX_WORKERS
+    ) -> None:
+        """Initialize the worker pool."""
+        self._hass = hass
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="aquanta"
+        )
+        self._lock = threading.Lock()
+        self._waiting: set[asyncio.Future] = set()
+        self._queued = 0
+        self._max_queued = 0
+        self._jobs = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def async_run(self, target: Callable[..., _T], *args: Any) -> _T:
+        """Run a blocking call on the pool and return its result."""
+        with self._lock:
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+        try:
+            future = self._executor.submit(self._run, time.monotonic(), target, args)
+        except RuntimeError:
+            with self._lock:
+                self._queued -= 1
+            raise
+
+        waiting = asyncio.wrap_future(future)
+        self._waiting.add(waiting)
+        try:
+            return await waiting
+        except asyncio.CancelledError:
+            # A job cancelled before a worker picked it up never dequeued itself
+            if future.cancel():
+                with self._lock:
+                    self._queued -= 1
+            raise
+        finally:
+            self._waiting.discard(waiting)
+
+    def _run(self, submitted: float, target: Callable[..., _T], args: tuple) -> _T:
+        """Record how long the job waited for a worker, then run it."""
+        wait = time.monotonic() - submitted
+
+        with self._lock:
+            self._queued -= 1
+            self._jobs += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+
+        return target(*args)
+
+    def stats(self) -> dict[str, Any]:
+        """Return queue depth and wait time metrics."""
+        with self._lock:
+            return {
+                "max_workers": self._max_workers,
+                "queued": self._queued,
+                "max_queued": self._max_queued,
+                "jobs": self._jobs,
+                "wait_avg": self._wait_total / self._jobs if self._jobs else None,
+                "wait_max": self._wait_max,
+            }
+
+    async def async_shutdown(self) -> None:
+        """Cancel queued jobs and wait for running ones off the event loop.
+
+        Callers still awaiting a job are cancelled straight away rather than
+        left waiting on a request that is being torn down.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for waiting in self._waiting:
+            waiting.cancel()
+        await self._hass.async_add_executor_job(
+            partial(self._executor.shutdown, wait=True)
+        )
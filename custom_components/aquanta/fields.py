@@ -0,0 +1,415 @@
+"""Declarative registry of the Aquanta values exposed as entities.
+
+Each field names the snapshot endpoint and key path its value is read from,
+an optional transform and the fields it depends on. Accessors are compiled
+once at import time, and the entity platforms build their entities from the
+fields registered for them. Endpoint responses are decoded into snapshots
+holding only the keys some field reads.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, NamedTuple
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # pragma: no cover
+    from json import loads as json_loads
+
+from homeassistant.components.binary_sensor import BinarySensorEntityDescription
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.components.switch import (
+    SwitchDeviceClass,
+    SwitchEntityDescription,
+)
+from homeassistant.components.water_heater import (
+    STATE_ECO,
+    STATE_OFF,
+    STATE_PERFORMANCE,
+)
+from homeassistant.const import PERCENTAGE, Platform, UnitOfTemperature
+from homeassistant.helpers.entity import EntityCategory, EntityDescription
+
+
+@dataclass(frozen=True)
+class AquantaField:
+    """Describe a value read from an Aquanta device snapshot."""
+
+    key: str
+    endpoint: str
+    path: tuple[str, ...] = ()
+    transform: Callable[[Any], Any] | None = None
+    requires: tuple[str, ...] = ()
+    default: Any = None
+    platform: Platform | None = None
+    description: EntityDescription | None = None
+    turn_on: str | None = None
+    turn_off: str | None = None
+    # Top-level endpoint keys read by a transform given the whole payload
+    uses: tuple[str, ...] = ()
+    # Projections of used keys to the part the transform reads, as key and
+    # projection pairs; a key is only projected if all its readers agree
+    projections: tuple[tuple[str, Callable[[Any], Any]], ...] = ()
+    # Sensor state write limits, see AquantaSensor
+    deadband: float | None = None
+    min_interval: timedelta | None = None
+    max_interval: timedelta | None = None
+
+
+class CompiledField(NamedTuple):
+    """A field together with its precomputed accessor."""
+
+    field: AquantaField
+    value: Callable[[dict], Any]
+    endpoints: frozenset[str]
+
+
+def _ongoing_records(records: list[dict]) -> list[dict]:
+    """Keep the type and state of the ongoing records, all the mode transforms read."""
+    return [
+        {"type": record["type"], "state": record["state"]}
+        for record in records
+        if record["state"] == "ongoing"
+    ]
+
+
+def _mode_active(mode: str) -> Callable[[dict], bool]:
+    """Return a transform checking whether a mode is current or ongoing."""
+
+    def transform(info: dict) -> bool:
+        if info["currentMode"]["type"] == mode:
+            return True
+
+        for record in info["records"]:
+            if record["type"] == mode and record["state"] == "ongoing":
+                return True
+
+        return False
+
+    return transform
+
+
+def _operation(info: dict) -> str:
+    """Map the current mode and records to a water heater operation."""
+    if info["currentMode"]["type"] == "off":
+        return STATE_OFF
+
+    operation = STATE_ECO
+
+    for record in info["records"]:
+        if record["state"] != "ongoing":
+            continue
+        if record["type"] == "away":
+            return STATE_OFF
+        if record["type"] == "boost":
+            operation = STATE_PERFORMANCE
+
+    return operation
+
+
+FIELDS: tuple[AquantaField, ...] = (
+    AquantaField(
+        key="title",
+        endpoint="info",
+        path=("title",),
+    ),
+    AquantaField(
+        key="operation",
+        endpoint="info",
+        transform=_operation,
+        uses=("currentMode", "records"),
+        projections=(("records", _ongoing_records),),
+    ),
+    AquantaField(
+        key="thermostat_active",
+        endpoint="advanced",
+        path=("thermostatEnabled",),
+    ),
+    AquantaField(
+        key="current_temperature",
+        endpoint="water",
+        path=("temperature",),
+        platform=Platform.SENSOR,
+        deadband=0.5,
+        min_interval=timedelta(minutes=2),
+        max_interval=timedelta(minutes=30),
+        description=SensorEntityDescription(
+            key="current_temperature",
+            name="Temperature",
+            device_class=SensorDeviceClass.TEMPERATURE,
+            state_class=SensorStateClass.MEASUREMENT,
+            native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+            icon="mdi:water-thermometer",
+        ),
+    ),
+    AquantaField(
+        key="set_point",
+        endpoint="advanced",
+        path=("setPoint",),
+        requires=("thermostat_active",),
+        platform=Platform.SENSOR,
+        description=SensorEntityDescription(
+            key="set_point",
+            name="Set point",
+            device_class=SensorDeviceClass.TEMPERATURE,
+            state_class=SensorStateClass.MEASUREMENT,
+            native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+            icon="mdi:thermometer-water",
+        ),
+    ),
+    AquantaField(
+        key="hot_water_available",
+        endpoint="water",
+        path=("available",),
+        transform=lambda available: available * 100,
+        platform=Platform.SENSOR,
+        deadband=2,
+        min_interval=timedelta(minutes=2),
+        max_interval=timedelta(minutes=30),
+        description=SensorEntityDescription(
+            key="hot_water_available",
+            name="Hot water available",
+            state_class=SensorStateClass.MEASUREMENT,
+            native_unit_of_measurement=PERCENTAGE,
+            icon="mdi:water-percent",
+            suggested_display_precision=1,
+        ),
+    ),
+    AquantaField(
+        key="current_mode",
+        endpoint="info",
+        path=("currentMode", "type"),
+        platform=Platform.SENSOR,
+        description=SensorEntityDescription(
+            key="current_mode",
+            name="Mode",
+            device_class=SensorDeviceClass.ENUM,
+            icon="mdi:water-sync",
+            options=[
+                "away",
+                "boost",
+                "intelligence",
+                "off",
+                "setpoint",
+                "timer",
+            ],
+        ),
+    ),
+    AquantaField(
+        key="control_enabled",
+        endpoint="advanced",
+        path=("controlEnabled",),
+        default=False,
+        platform=Platform.BINARY_SENSOR,
+        description=BinarySensorEntityDescription(
+            key="control_enabled",
+            name="Control enabled",
+            entity_category=EntityCategory.DIAGNOSTIC,
+        ),
+    ),
+    AquantaField(
+        key="intelligence_enabled",
+        endpoint="advanced",
+        path=("intelEnabled",),
+        requires=("control_enabled",),
+        default=False,
+        platform=Platform.BINARY_SENSOR,
+        description=BinarySensorEntityDescription(
+            key="intelligence_enabled",
+            name="Intelligence enabled",
+            entity_category=EntityCategory.DIAGNOSTIC,
+        ),
+    ),
+    AquantaField(
+        key="thermostat_enabled",
+        endpoint="advanced",
+        path=("thermostatEnabled",),
+        requires=("control_enabled",),
+        default=False,
+        platform=Platform.BINARY_SENSOR,
+        description=BinarySensorEntityDescription(
+            key="thermostat_enabled",
+            name="Thermostat enabled",
+            entity_category=EntityCategory.DIAGNOSTIC,
+        ),
+    ),
+    AquantaField(
+        key="time_of_use_enabled",
+        endpoint="advanced",
+        path=("touEnabled",),
+        requires=("control_enabled",),
+        default=False,
+        platform=Platform.BINARY_SENSOR,
+        description=BinarySensorEntityDescription(
+            key="time_of_use_enabled",
+            name="Time-of-use enabled",
+            entity_category=EntityCategory.DIAGNOSTIC,
+        ),
+    ),
+    AquantaField(
+        key="timer_enabled",
+        endpoint="advanced",
+        path=("timerEnabled",),
+        requires=("control_enabled",),
+        default=False,
+        platform=Platform.BINARY_SENSOR,
+        description=BinarySensorEntityDescription(
+            key="timer_enabled",
+            name="Timer enabled",
+            entity_category=EntityCategory.DIAGNOSTIC,
+        ),
+    ),
+    AquantaField(
+        key="away",
+        endpoint="info",
+        transform=_mode_active("away"),
+        uses=("currentMode", "records"),
+        projections=(("records", _ongoing_records),),
+        platform=Platform.SWITCH,
+        description=SwitchEntityDescription(
+            key="away",
+            name="Away",
+            device_class=SwitchDeviceClass.SWITCH,
+        ),
+        turn_on="async_turn_away_mode_on",
+        turn_off="async_turn_away_mode_off",
+    ),
+    AquantaField(
+        key="boost",
+        endpoint="info",
+        transform=_mode_active("boost"),
+        uses=("currentMode", "records"),
+        projections=(("records", _ongoing_records),),
+        platform=Platform.SWITCH,
+        description=SwitchEntityDescription(
+            key="boost",
+            name="Boost",
+            device_class=SwitchDeviceClass.SWITCH,
+        ),
+        turn_on="async_turn_boost_mode_on",
+        turn_off="async_turn_boost_mode_off",
+    ),
+)
+
+
+def _compile(field: AquantaField, compiled: dict[str, CompiledField]) -> CompiledField:
+    """Build the accessor for a field from its already compiled dependencies."""
+    if unused := {key for key, _ in field.projections}.difference(field.uses):
+        raise ValueError(f"Field {field.key} projects keys it does not use: {unused}")
+
+    keys = (field.endpoint, *field.path)
+    transform = field.transform
+    requires = tuple(compiled[key].value for key in field.requires)
+    default = field.default
+
+    def value(device: dict) -> Any:
+        for require in requires:
+            if not require(device):
+                return default
+
+        result = device
+        for key in keys:
+            result = result[key]
+
+        if transform is None:
+            return result
+        return transform(result)
+
+    endpoints = frozenset({field.endpoint}).union(
+        *(compiled[key].endpoints for key in field.requires)
+    )
+
+    return CompiledField(field, value, endpoints)
+
+
+COMPILED_FIELDS: dict[str, CompiledField] = {}
+
+for _field in FIELDS:
+    COMPILED_FIELDS[_field.key] = _compile(_field, COMPILED_FIELDS)
+
+
+def platform_fields(platform: Platform) -> tuple[CompiledField, ...]:
+    """Return the compiled fields that create entities on a platform."""
+    return tuple(
+        compiled
+        for compiled in COMPILED_FIELDS.values()
+        if compiled.field.platform == platform
+    )
+
+
+def _endpoint_keys() -> dict[str, frozenset[str] | None]:
+    """Return the top-level keys read per endpoint; None means all of them."""
+    keys: dict[str, set[str] | None] = defaultdict(set)
+
+    for field in FIELDS:
+        if keys[field.endpoint] is None:
+            continue
+        if field.path:
+            keys[field.endpoint].add(field.path[0])
+        elif field.uses:
+            keys[field.endpoint].update(field.uses)
+        else:
+            keys[field.endpoint] = None
+
+    return {
+        endpoint: None if used is None else frozenset(used)
+        for endpoint, used in keys.items()
+    }
+
+
+def _endpoint_projections(
+    fields: tuple[AquantaField, ...],
+) -> dict[str, dict[str, Callable[[Any], Any]]]:
+    """Return the projections applied per endpoint and top-level key.
+
+    A key is kept whole as soon as one field reads it by path or uses it
+    without declaring the same projection as the other fields reading it.
+    """
+    readers: dict[tuple[str, str], set[Callable[[Any], Any] | None]] = defaultdict(set)
+
+    for field in fields:
+        projections = dict(field.projections)
+        for key in field.uses:
+            readers[field.endpoint, key].add(projections.get(key))
+        if field.path:
+            readers[field.endpoint, field.path[0]].add(None)
+
+    result: dict[str, dict[str, Callable[[Any], Any]]] = defaultdict(dict)
+    for (endpoint, key), projections in readers.items():
+        if len(projections) == 1 and (projection := projections.pop()) is not None:
+            result[endpoint][key] = projection
+
+    return dict(result)
+
+
+ENDPOINT_KEYS = _endpoint_keys()
+ENDPOINT_PROJECTIONS = _endpoint_projections(FIELDS)
+
+
+def decode(endpoint: str, raw: bytes) -> dict:
+    """Decode an endpoint response into a snapshot of the values fields read."""
+    payload = json_loads(raw)
+    keys = ENDPOINT_KEYS.get(endpoint)
+
+    if keys is None:
+        return payload
+
+    projections = ENDPOINT_PROJECTIONS.get(endpoint, {})
+
+    snapshot = {}
+    for key in keys:
+        if key in payload:
+            value = payload[key]
+            if (projection := projections.get(key)) is not None:
+                value = projection(value)
+            snapshot[key] = value
+
+    return snapshot
@@ -0,0 +1,382 @@
+"""Hot water demand profiles and shortfall forecasts."""
+
+from __future__ import annotations
+
+from collections.abc import Container, Iterable
+from datetime import datetime, timedelta
+from functools import partial
+
+import numpy as np
+
+from homeassistant.const import Platform
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, State, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.storage import Store
+import homeassistant.util.dt as dt_util
+
+from .const import DOMAIN, HOT_WATER_LOW_PERCENT, LOGGER
+from .fields import COMPILED_FIELDS
+
+_AVAILABLE_FIELD = COMPILED_FIELDS["hot_water_available"]
+_AVAILABLE = _AVAILABLE_FIELD.value
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 300
+
+BIN_SECONDS = 15 * 60
+DAY_BINS = 24 * 3600 // BIN_SECONDS
+WEEK_BINS = 7 * DAY_BINS
+# The Unix epoch was a Thursday; shift it so bin 0 starts on a Monday
+_WEEK_ORIGIN = 3 * 24 * 3600
+
+# Sample intervals longer than this say nothing about usage and are skipped
+MAX_SAMPLE_GAP = 10 * 60
+# Older observations lose half their weight over this period
+HALF_LIFE = timedelta(weeks=4).total_seconds()
+# Seconds observed in a bin of the week before it is trusted over the day
+MIN_WEEKLY_SECONDS = 3 * BIN_SECONDS
+# Seconds observed in total before forecasting
+MIN_FIT_SECONDS = 24 * 3600
+
+REFIT_INTERVAL = timedelta(hours=1).total_seconds()
+HORIZON_BINS = DAY_BINS
+
+# Recorded history a device without a profile is fitted to
+HISTORY_PERIOD = timedelta(weeks=4)
+# Spacing of the samples recorded states are resampled to
+HISTORY_STEP = 60
+
+
+def _week_bins(timestamps: np.ndarray, utc_offset: float) -> np.ndarray:
+    """Return the local bin of the week each timestamp falls in."""
+    return ((timestamps + utc_offset + _WEEK_ORIGIN) // BIN_SECONDS).astype(
+        np.int64
+    ) % WEEK_BINS
+
+
+def history_samples(
+    states: Iterable[State], end: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """Resample recorded states to samples every HISTORY_STEP seconds.
+
+    A state is only recorded when it changes, so each value is held until
+    the next state or end. Non-numeric states, such as unavailable, hold no
+    value and leave a gap.
+    """
+    times = []
+    values = []
+    for state in states:
+        try:
+            value = float(state.state)
+        except ValueError:
+            value = np.nan
+        times.append(state.last_changed.timestamp())
+        values.append(value)
+
+    if not times:
+        return np.empty(0), np.empty(0)
+
+    changes = np.asarray(times, dtype=float)
+    grid = np.arange(changes[0], end, HISTORY_STEP, dtype=float)
+    samples = np.union1d(grid, changes[changes < end])
+    held = np.asarray(values, dtype=float)[
+        np.searchsorted(changes, samples, side="right") - 1
+    ]
+    known = ~np.isnan(held)
+    return samples[known], held[known]
+
+
+class DemandProfile:
+    """Expected change of hot water available for each 15 minutes of the week.
+
+    Consecutive availability samples are turned into a rate of change in
+    percentage points per second, accumulated per bin of the week weighted
+    by the time observed. Samples are buffered and folded in by refit() as
+    one vectorized batch, decaying what was learned before, so the profile
+    follows changes in habits without keeping the sample history.
+    """
+
+    def __init__(
+        self,
+        changes: list[float] | None = None,
+        seconds: list[float] | None = None,
+        fitted: float | None = None,
+    ) -> None:
+        """Initialize the profile, from saved sums if given."""
+        self.changes = np.zeros(WEEK_BINS) if changes is None else np.array(changes)
+        self.seconds = np.zeros(WEEK_BINS) if seconds is None else np.array(seconds)
+        self.fitted = fitted
+        self._times: list[float] = []
+        self._values: list[float] = []
+
+    @classmethod
+    def fit(cls, timestamps, values, utc_offset: float = 0.0) -> DemandProfile:
+        """Return a profile fitted offline to a history of samples."""
+        profile = cls()
+        profile._times = list(timestamps)
+        profile._values = list(values)
+        profile.refit(utc_offset)
+        return profile
+
+    def add_sample(self, timestamp: float, value: float) -> None:
+        """Buffer a sample for the next refit."""
+        self._times.append(timestamp)
+        self._values.append(value)
+
+    def refit_due(self, now: float) -> bool:
+        """Return whether the buffered samples should be folded in."""
+        return len(self._times) > 1 and (
+            self.fitted is None or now - self.fitted >= REFIT_INTERVAL
+        )
+
+    def refit(self, utc_offset: float = 0.0) -> None:
+        """Fold the buffered samples into the profile."""
+        if len(self._times) < 2:
+            return
+
+        times = np.asarray(self._times, dtype=float)
+        values = np.asarray(self._values, dtype=float)
+        durations = np.diff(times)
+        changes = np.diff(values)
+        valid = (durations > 0) & (durations <= MAX_SAMPLE_GAP)
+        bins = _week_bins(times[:-1][valid], utc_offset)
+
+        if self.fitted is not None:
+            decay = 0.5 ** ((times[-1] - self.fitted) / HALF_LIFE)
+            self.changes *= decay
+            self.seconds *= decay
+
+        self.changes += np.bincount(bins, changes[valid], minlength=WEEK_BINS)
+        self.seconds += np.bincount(bins, durations[valid], minlength=WEEK_BINS)
+        self.fitted = float(times[-1])
+
+        # Keep the last sample so the next batch continues from it
+        self._times = self._times[-1:]
+        self._values = self._values[-1:]
+
+    def rates(self) -> np.ndarray | None:
+        """Return the expected change per second for each bin of the week.
+
+        Bins of the week observed long enough use their own rate; the others
+        fall back to the rate of that time of day over all days.
+        """
+        if self.seconds.sum() < MIN_FIT_SECONDS:
+            return None
+
+        daily_changes = self.changes.reshape(7, DAY_BINS).sum(0)
+        daily_seconds = self.seconds.reshape(7, DAY_BINS).sum(0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weekly = self.changes / self.seconds
+            daily = daily_changes / daily_seconds
+
+        rates = np.where(self.seconds >= MIN_WEEKLY_SECONDS, weekly, np.tile(daily, 7))
+        return np.nan_to_num(rates)
+
+    def shortfall(
+        self,
+        now: float,
+        available: float,
+        threshold: float = HOT_WATER_LOW_PERCENT,
+        utc_offset: float = 0.0,
+    ) -> float | None:
+        """Return when hot water is expected to drop below threshold.
+
+        None means not within the forecast horizon, or not enough history.
+        """
+        if available < threshold:
+            return now
+
+        if (rates := self.rates()) is None:
+            return None
+
+        start_bin = int(_week_bins(np.array([now]), utc_offset)[0])
+        into_bin = (now + utc_offset + _WEEK_ORIGIN) % BIN_SECONDS
+        steps = np.full(HORIZON_BINS, float(BIN_SECONDS))
+        steps[0] -= into_bin
+        bin_changes = rates[(start_bin + np.arange(HORIZON_BINS)) % WEEK_BINS] * steps
+
+        # Levels at the end of each bin, capped at a full tank
+        levels = available + np.cumsum(bin_changes)
+        levels -= np.maximum(np.maximum.accumulate(levels - 100), 0)
+
+        below = np.flatnonzero(levels < threshold)
+        if not below.size:
+            return None
+
+        index = int(below[0])
+        before = available if index == 0 else float(levels[index - 1])
+        drop = before - float(levels[index])
+        fraction = (before - threshold) / drop if drop > 0 else 0.0
+        return now + float(steps[:index].sum()) + fraction * float(steps[index])
+
+    def as_dict(self) -> dict:
+        """Return the profile for storage."""
+        return {
+            "changes": np.round(self.changes, 6).tolist(),
+            "seconds": np.round(self.seconds, 3).tolist(),
+            "fitted": self.fitted,
+        }
+
+
+class AquantaForecaster:
+    """Persisted demand profiles and shortfall forecasts of an Aquanta account."""
+
+    # Endpoints the forecaster reads from every device
+    endpoints = _AVAILABLE_FIELD.endpoints
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the forecaster."""
+        self._store: Store[dict] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.forecast.{entry_id}"
+        )
+        self._hass = hass
+        self._profiles: dict[str, DemandProfile] = {}
+        self._shortfalls: dict[str, datetime | None] = {}
+        self._listeners: list[CALLBACK_TYPE] = []
+        # Devices whose profile is being fitted to their recorded history
+        self._seeding: set[str] = set()
+
+    async def async_load(self) -> None:
+        """Load the saved profiles."""
+        data = await self._store.async_load() or {}
+        self._profiles = {
+            aquanta_id: DemandProfile(**saved)
+            for aquanta_id, saved in data.get("devices", {}).items()
+        }
+
+    async def async_seed(self, account_id: str, aquanta_ids: Iterable) -> None:
+        """Fit the devices without a profile to their recorded history.
+
+        The history is that of each device's hot water available sensor, so
+        devices that were set up before the forecaster was, or whose saved
+        profile was lost, forecast straight away. Live samples of a device
+        are not taken while its history is fitted, as it covers them.
+        """
+        if "recorder" not in self._hass.config.components:
+            return
+
+        registry = er.async_get(self._hass)
+        entity_ids = {}
+        for aquanta_id in aquanta_ids:
+            profile = self._profiles.get(str(aquanta_id))
+            # A profile that has not been fitted yet holds a sample at most
+            if profile is not None and profile.fitted is not None:
+                continue
+            entity_id = registry.async_get_entity_id(
+                Platform.SENSOR,
+                DOMAIN,
+                f"{account_id}_{aquanta_id}_{_AVAILABLE_FIELD.field.key}",
+            )
+            if entity_id is not None:
+                entity_ids[str(aquanta_id)] = entity_id
+
+        if not entity_ids:
+            return
+
+        # pylint: disable-next=import-outside-toplevel
+        from homeassistant.components.recorder import get_instance, history
+
+        self._seeding.update(entity_ids)
+        try:
+            end = dt_util.utcnow()
+            start = end - HISTORY_PERIOD
+            for aquanta_id, entity_id in entity_ids.items():
+                states = await get_instance(self._hass).async_add_executor_job(
+                    partial(
+                        history.state_changes_during_period,
+                        self._hass,
+                        start,
+                        end,
+                        entity_id,
+                        no_attributes=True,
+                    )
+                )
+                times, values = history_samples(
+                    states.get(entity_id, ()), end.timestamp()
+                )
+                if len(times) < 2:
+                    continue
+
+                utc_offset = dt_util.as_local(end).utcoffset().total_seconds()
+                self._profiles[aquanta_id] = DemandProfile.fit(
+                    times, values, utc_offset
+                )
+                LOGGER.debug(
+                    "Fitted the demand profile of %s to %d recorded samples",
+                    aquanta_id,
+                    len(times),
+                )
+        finally:
+            self._seeding.difference_update(entity_ids)
+
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """Save the profiles now."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Delete the saved profiles."""
+        await self._store.async_remove()
+
+    def _data_to_save(self) -> dict:
+        return {
+            "devices": {
+                aquanta_id: profile.as_dict()
+                for aquanta_id, profile in self._profiles.items()
+            }
+        }
+
+    @callback
+    def async_update(self, data: dict, failing: Container[tuple] = ()) -> None:
+        """Sample the hot water available of every device and forecast it.
+
+        Devices whose water endpoint is failing are not sampled, as their
+        value is stale, nor are devices whose history is being fitted.
+        """
+        now_dt = dt_util.utcnow()
+        now = now_dt.timestamp()
+        utc_offset = dt_util.as_local(now_dt).utcoffset().total_seconds()
+        refitted = False
+
+        for aquanta_id, device in data["devices"].items():
+            if (aquanta_id, "water") in failing:
+                continue
+            if str(aquanta_id) in self._seeding:
+                continue
+
+            available = _AVAILABLE(device)
+            profile = self._profiles.get(str(aquanta_id))
+            if profile is None:
+                profile = self._profiles[str(aquanta_id)] = DemandProfile()
+
+            profile.add_sample(now, available)
+            if profile.refit_due(now):
+                profile.refit(utc_offset)
+                refitted = True
+
+            shortfall = profile.shortfall(now, available, utc_offset=utc_offset)
+            self._shortfalls[str(aquanta_id)] = (
+                None if shortfall is None else dt_util.utc_from_timestamp(shortfall)
+            )
+
+        if refitted:
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def shortfall(self, aquanta_id) -> datetime | None:
+        """Return when a device is expected to run short of hot water."""
+        return self._shortfalls.get(str(aquanta_id))
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for forecast updates; returns a callback that stops listening."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
@@ -0,0 +1,126 @@
+"""On-demand profiling of Aquanta refresh cycles."""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+import cProfile
+import io
+import pstats
+import threading
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .const import LOGGER
+
+if TYPE_CHECKING:
+    from .coordinator import AquantaCoordinator
+
+_T = TypeVar("_T")
+
+SUMMARY_LINES = 40
+
+
+class AquantaProfiler:
+    """Profile the next refresh cycles of a set of coordinators.
+
+    A cycle covers the fetch on the worker pool, and the entity state writes
+    and timeline and forecast updates that follow it on the event loop.
+    Coordinators only check whether a
+    profiler is attached, so nothing is measured while none is running.
+    """
+
+    def __init__(self, hass: HomeAssistant, cycles: int) -> None:
+        """Initialize the profiler."""
+        self._hass = hass
+        self._cycles = cycles
+        self._remaining: dict[AquantaCoordinator, int] = {}
+        self._active = 0
+        self._loop_profile = cProfile.Profile()
+        self._worker_profiles: list[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def attach(self, coordinator: AquantaCoordinator) -> None:
+        """Profile the next refresh cycles of a coordinator."""
+        self._remaining[coordinator] = self._cycles
+        coordinator.profiler = self
+
+    def detach(self) -> None:
+        """Stop profiling every coordinator, without writing a profile."""
+        for coordinator in self._remaining:
+            coordinator.profiler = None
+        self._remaining.clear()
+
+    async def async_profile_refresh(
+        self, coordinator: AquantaCoordinator, refresh: Awaitable[None]
+    ) -> None:
+        """Profile a coordinator refresh, including its listener updates."""
+        if self._active == 0:
+            try:
+                self._loop_profile.enable()
+            except ValueError:
+                # Another profiler, such as HA's own, holds the event loop
+                LOGGER.warning("Aquanta profiling stopped: another profiler is active")
+                self.detach()
+                await refresh
+                return
+        self._active += 1
+
+        try:
+            await refresh
+        finally:
+            self._active -= 1
+            if self._active == 0:
+                self._loop_profile.disable()
+
+            self._remaining[coordinator] -= 1
+            if self._remaining[coordinator] <= 0:
+                del self._remaining[coordinator]
+                coordinator.profiler = None
+
+                if not self._remaining:
+                    self._hass.async_create_background_task(
+                        self.async_write(), "aquanta profile"
+                    )
+
+    def run_job(self, target: Callable[..., _T], *args: Any) -> _T:
+        """Run a blocking job in a worker thread under its own profile."""
+        profile = cProfile.Profile()
+
+        try:
+            profile.enable()
+        except ValueError:
+            # Profilers built on sys.monitoring already cover every thread
+            return target(*args)
+
+        try:
+            return target(*args)
+        finally:
+            profile.disable()
+            with self._lock:
+                self._worker_profiles.append(profile)
+
+    async def async_write(self) -> None:
+        """Write the collected profile and a summary to the config directory."""
+        base = self._hass.config.path(
+            f"aquanta_profile.{dt_util.utcnow().strftime('%Y%m%d%H%M%S')}"
+        )
+        await self._hass.async_add_executor_job(self._write, base)
+        LOGGER.warning("Aquanta profile written to %s.prof and %s.txt", base, base)
+
+    def _write(self, base: str) -> None:
+        """Merge the loop and worker profiles and write them out."""
+        stats = pstats.Stats(self._loop_profile)
+        with self._lock:
+            for profile in self._worker_profiles:
+                stats.add(profile)
+
+        stats.dump_stats(f"{base}.prof")
+
+        summary = io.StringIO()
+        stats.stream = summary
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_LINES)
+
+        with open(f"{base}.txt", "w", encoding="utf-8") as file:
+            file.write(summary.getvalue())
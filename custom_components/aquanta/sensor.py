@@ -2,91 +2,55 @@
 
 from __future__ import annotations
 
+from datetime import datetime, timedelta
+
 from homeassistant.components.sensor import (
-    SensorEntity,
     SensorDeviceClass,
-    SensorStateClass,
+    SensorEntity,
     SensorEntityDescription,
+    SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfTemperature, PERCENTAGE
-from homeassistant.core import HomeAssistant
+from homeassistant.const import PERCENTAGE, Platform
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
+import homeassistant.util.dt as dt_util
 
 from .entity import AquantaEntity
-from .const import DOMAIN, LOGGER
+from .const import (
+    AUTO_BOOST_COOLDOWN,
+    AUTO_BOOST_LEAD,
+    CONF_AUTO_BOOST,
+    DOMAIN,
+    LOGGER,
+)
 from .coordinator import AquantaCoordinator
+from .fields import CompiledField, platform_fields
+from .timeline import DUTY_CYCLE_WINDOWS
+
+ENTITY_DESCRIPTIONS = platform_fields(Platform.SENSOR)
+
+DUTY_CYCLE_MODES = ("away", "boost", "intelligence", "off")
+
+DUTY_CYCLE_DESCRIPTIONS = tuple(
+    SensorEntityDescription(
+        key=f"{mode}_duty_cycle_{window}",
+        name=f"{mode.capitalize()} duty cycle ({window})",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=PERCENTAGE,
+        icon="mdi:chart-donut",
+        suggested_display_precision=1,
+    )
+    for mode in DUTY_CYCLE_MODES
+    for window in DUTY_CYCLE_WINDOWS
+)
 
-ENTITY_DESCRIPTIONS = (
-    {
-        "desc": SensorEntityDescription(
-            key="current_temperature",
-            name="Temperature",
-            device_class=SensorDeviceClass.TEMPERATURE,
-            state_class=SensorStateClass.MEASUREMENT,
-            native_unit_of_measurement=UnitOfTemperature.CELSIUS,
-            icon="mdi:water-thermometer",
-        ),
-        "native_value": lambda entity: entity.coordinator.data["devices"][
-            entity.aquanta_id
-        ]["water"]["temperature"],
-        "suggested_precision": None,
-        "options": None,
-    },
-    {
-        "desc": SensorEntityDescription(
-            key="set_point",
-            name="Set point",
-            device_class=SensorDeviceClass.TEMPERATURE,
-            state_class=SensorStateClass.MEASUREMENT,
-            native_unit_of_measurement=UnitOfTemperature.CELSIUS,
-            icon="mdi:thermometer-water",
-        ),
-        "native_value": lambda entity: entity.coordinator.data["devices"][
-            entity.aquanta_id
-        ]["advanced"]["setPoint"]
-        if entity.coordinator.data["devices"][entity.aquanta_id]["advanced"][
-            "thermostatEnabled"
-        ]
-        else None,
-        "suggested_precision": None,
-        "options": None,
-    },
-    {
-        "desc": SensorEntityDescription(
-            key="hot_water_available",
-            name="Hot water available",
-            state_class=SensorStateClass.MEASUREMENT,
-            native_unit_of_measurement=PERCENTAGE,
-            icon="mdi:water-percent",
-        ),
-        "native_value": lambda entity: (
-            entity.coordinator.data["devices"][entity.aquanta_id]["water"]["available"]
-            * 100
-        ),
-        "suggested_precision": 1,
-        "options": None,
-    },
-    {
-        "desc": SensorEntityDescription(
-            key="current_mode",
-            name="Mode",
-            device_class=SensorDeviceClass.ENUM,
-            icon="mdi:water-sync",
-        ),
-        "native_value": lambda entity: entity.coordinator.data["devices"][
-            entity.aquanta_id
-        ]["info"]["currentMode"]["type"],
-        "suggested_precision": None,
-        "options": [
-            "away",
-            "boost",
-            "intelligence",
-            "off",
-            "setpoint",
-            "timer",
-        ],
-    },
+SHORTFALL_DESCRIPTION = SensorEntityDescription(
+    key="predicted_shortfall",
+    name="Predicted hot water shortfall",
+    device_class=SensorDeviceClass.TIMESTAMP,
+    icon="mdi:water-alert",
 )
 
 
@@ -102,15 +66,30 @@ async def async_setup_entry(
     entities: list[AquantaSensor] = []
 
     for aquanta_id in coordinator.data["devices"]:
-        for entity_info in ENTITY_DESCRIPTIONS:
+        for compiled in ENTITY_DESCRIPTIONS:
             entities.append(
                 AquantaSensor(
                     coordinator,
                     aquanta_id,
-                    entity_info["desc"],
-                    entity_info["native_value"],
-                    entity_info["suggested_precision"],
-                    entity_info["options"],
+                    compiled,
+                    deadband=compiled.field.deadband,
+                    min_interval=compiled.field.min_interval,
+                    max_interval=compiled.field.max_interval,
+                )
+            )
+
+        if coordinator.timeline is not None:
+            for description in DUTY_CYCLE_DESCRIPTIONS:
+                entities.append(
+                    AquantaDutyCycleSensor(coordinator, aquanta_id, description)
+                )
+
+        if coordinator.forecaster is not None:
+            entities.append(
+                AquantaShortfallSensor(
+                    coordinator,
+                    aquanta_id,
+                    auto_boost=config_entry.options.get(CONF_AUTO_BOOST, False),
                 )
             )
 
@@ -118,7 +97,14 @@ async def async_setup_entry(
 
 
 class AquantaSensor(AquantaEntity, SensorEntity):
-    """Represents a sensor for an Aquanta water heater controller."""
+    """Represents a sensor for an Aquanta water heater controller.
+
+    State writes can be limited for high-churn sensors: changes smaller than
+    ``deadband`` are not written, writes are at least ``min_interval`` apart
+    (a change within it is written when it ends), and a value that drifted
+    within the deadband is written ``max_interval`` after the last write to
+    keep the history continuous.
+    """
 
     _attr_has_entity_name = True
     _attr_should_poll = True
@@ -127,40 +113,244 @@ class AquantaSensor(AquantaEntity, SensorEntity):
         self,
         coordinator: AquantaCoordinator,
         aquanta_id,
-        entity_description: SensorEntityDescription,
-        native_value_func,
-        suggested_precision: int | None,
-        options: list | None,
+        compiled: CompiledField,
+        deadband: float | None = None,
+        min_interval: timedelta | None = None,
+        max_interval: timedelta | None = None,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator, aquanta_id)
-        self.entity_description: entity_description
-        self._attr_name = entity_description.name
-        self._native_value_func = native_value_func
-        self._attr_unique_id = self._base_unique_id + "_" + entity_description.key
+        super().__init__(coordinator, aquanta_id, compiled.endpoints)
+        self.entity_description = compiled.field.description
+        self._attr_name = self.entity_description.name
+        self._native_value_func = compiled.value
+        self._attr_unique_id = self._base_unique_id + "_" + self.entity_description.key
+        self._deadband = deadband
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._limited = (
+            deadband is not None or min_interval is not None or max_interval is not None
+        )
+        self._written_value = None
+        self._written_available: bool | None = None
+        self._written_at: datetime | None = None
+        self._unsub_deferred: CALLBACK_TYPE | None = None
+        self._deferred_at: datetime | None = None
         LOGGER.debug("Created sensor with unique ID %s", self._attr_unique_id)
 
-        if entity_description.device_class is not None:
-            self._attr_device_class = entity_description.device_class
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        return self._native_value_func(self.device_data)
 
-        if entity_description.state_class is not None:
-            self._attr_state_class = entity_description.state_class
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the new state, subject to the write limits."""
+        if not self._limited or self._written_at is None:
+            super()._handle_coordinator_update()
+            return
 
-        if entity_description.native_unit_of_measurement is not None:
-            self._attr_native_unit_of_measurement = (
-                entity_description.native_unit_of_measurement
-            )
+        # Going unavailable or coming back is never held back
+        if self.available != self._written_available:
+            self.async_write_ha_state()
+            return
 
-        if entity_description.icon is not None:
-            self._attr_icon = entity_description.icon
+        elapsed = dt_util.utcnow() - self._written_at
+        value = self.native_value
 
-        if suggested_precision is not None:
-            self._attr_suggested_display_precision = suggested_precision
+        if not self._exceeds_deadband(value):
+            # Heartbeat: write a drifted value once the maximum interval ends
+            if self._max_interval is not None and value != self._written_value:
+                self._async_write_later(self._max_interval - elapsed)
+            return
 
-        if options is not None:
-            self._attr_options = options
+        if self._min_interval is not None and elapsed < self._min_interval:
+            self._async_write_later(self._min_interval - elapsed)
+            return
 
-    @property
-    def native_value(self):
-        """Return the state of the sensor."""
-        return self._native_value_func(self)
+        self.async_write_ha_state()
+
+    def _exceeds_deadband(self, value) -> bool:
+        """Return whether a value differs enough from the written one."""
+        if value == self._written_value:
+            return False
+
+        if (
+            self._deadband is None
+            or not isinstance(value, int | float)
+            or not isinstance(self._written_value, int | float)
+        ):
+            return True
+
+        return abs(value - self._written_value) >= self._deadband
+
+    @callback
+    def _async_write_later(self, delay: timedelta) -> None:
+        """Write the then latest state after a delay, unless one is due sooner."""
+        if delay <= timedelta(0):
+            self.async_write_ha_state()
+            return
+
+        when = dt_util.utcnow() + delay
+        if self._unsub_deferred is not None:
+            if self._deferred_at <= when:
+                return
+            self._unsub_deferred()
+
+        self._deferred_at = when
+        self._unsub_deferred = async_call_later(
+            self.hass, delay, self._async_write_deferred
+        )
+
+    @callback
+    def _async_write_deferred(self, _now: datetime) -> None:
+        """Write the latest state once a deferred write is due."""
+        self._unsub_deferred = None
+        self.async_write_ha_state()
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write the state and remember what was written."""
+        super().async_write_ha_state()
+
+        if self._limited:
+            if self._unsub_deferred is not None:
+                self._unsub_deferred()
+                self._unsub_deferred = None
+            self._written_value = self.native_value if self.available else None
+            self._written_available = self.available
+            self._written_at = dt_util.utcnow()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel a pending deferred write."""
+        await super().async_will_remove_from_hass()
+        if self._unsub_deferred is not None:
+            self._unsub_deferred()
+            self._unsub_deferred = None
+
+
+class AquantaDutyCycleSensor(AquantaEntity, SensorEntity):
+    """Percentage of time a device spent in a mode over a rolling window.
+
+    The value comes from the coordinator's mode timeline and is rounded to
+    the displayed precision, so a state is only written when it visibly
+    changes.
+    """
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: AquantaCoordinator,
+        aquanta_id,
+        description: SensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, aquanta_id, frozenset({"info"}))
+        self.entity_description = description
+        self._attr_unique_id = self._base_unique_id + "_" + description.key
+        self._mode, _, self._window = description.key.partition("_duty_cycle_")
+        self._attr_native_value = self._duty_cycle()
+
+    def _duty_cycle(self) -> float | None:
+        value = self.coordinator.timeline.duty_cycle(
+            self.aquanta_id, self._window, self._mode
+        )
+        return None if value is None else round(value, 1)
+
+    async def async_added_to_hass(self) -> None:
+        """Listen for timeline updates when added to hass."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.timeline.async_add_listener(self._handle_timeline_update)
+        )
+
+    @callback
+    def _handle_timeline_update(self) -> None:
+        """Write the duty cycle when its rounded value changed."""
+        value = self._duty_cycle()
+        if value != self._attr_native_value:
+            self._attr_native_value = value
+            self.async_write_ha_state()
+
+
+class AquantaShortfallSensor(AquantaEntity, SensorEntity):
+    """When a device is expected to run short of hot water.
+
+    The forecast is rounded down to 5 minutes so small drifts don't write new
+    states. With auto_boost, boost mode is turned on once the shortfall is
+    within AUTO_BOOST_LEAD, unless the device is already boosting or away,
+    or was boosted automatically within AUTO_BOOST_COOLDOWN.
+    """
+
+    _attr_has_entity_name = True
+    entity_description = SHORTFALL_DESCRIPTION
+
+    def __init__(
+        self,
+        coordinator: AquantaCoordinator,
+        aquanta_id,
+        auto_boost: bool = False,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, aquanta_id, frozenset({"water", "info"}))
+        self._attr_unique_id = self._base_unique_id + "_" + self.entity_description.key
+        self._auto_boost = auto_boost
+        self._auto_boosted_at: datetime | None = None
+        self._attr_native_value = self._shortfall()
+
+    def _shortfall(self) -> datetime | None:
+        shortfall = self.coordinator.forecaster.shortfall(self.aquanta_id)
+        if shortfall is None:
+            return None
+        return shortfall.replace(
+            minute=shortfall.minute - shortfall.minute % 5, second=0, microsecond=0
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Listen for forecast updates when added to hass."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.forecaster.async_add_listener(self._handle_forecast_update)
+        )
+        self._async_boost_if_due()
+
+    @callback
+    def _handle_forecast_update(self) -> None:
+        """Write the forecast when it changed, and boost ahead of a shortfall."""
+        value = self._shortfall()
+        if value != self._attr_native_value:
+            self._attr_native_value = value
+            self.async_write_ha_state()
+
+        self._async_boost_if_due()
+
+    @callback
+    def _async_boost_if_due(self) -> None:
+        """Turn on boost mode if auto boost is on and a shortfall is near."""
+        if not self._auto_boost or not self._should_boost(self._attr_native_value):
+            return
+
+        self._auto_boosted_at = dt_util.utcnow()
+        LOGGER.info(
+            "Boosting %s ahead of a hot water shortfall at %s",
+            self.device_name(),
+            self._attr_native_value,
+        )
+        self.hass.async_create_task(
+            self.async_turn_boost_mode_on(), f"aquanta auto boost {self.aquanta_id}"
+        )
+
+    def _should_boost(self, shortfall: datetime | None) -> bool:
+        """Return whether to boost ahead of a predicted shortfall."""
+        now = dt_util.utcnow()
+        return (
+            shortfall is not None
+            and shortfall - now <= AUTO_BOOST_LEAD
+            and self.available
+            and not self.is_boost_mode_on
+            and not self.is_away_mode_on
+            and (
+                self._auto_boosted_at is None
+                or now - self._auto_boosted_at >= AUTO_BOOST_COOLDOWN
+            )
+        )
@@ -2,41 +2,18 @@
 
 from __future__ import annotations
 
-from homeassistant.components.switch import (
-    SwitchEntity,
-    SwitchDeviceClass,
-    SwitchEntityDescription,
-)
+from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .entity import AquantaEntity
 from .const import DOMAIN, LOGGER
 from .coordinator import AquantaCoordinator
+from .fields import CompiledField, platform_fields
 
-ENTITY_DESCRIPTIONS = (
-    {
-        "desc": SwitchEntityDescription(
-            key="away",
-            name="Away",
-            device_class=SwitchDeviceClass.SWITCH,
-        ),
-        "is_on": lambda entity: entity.is_away_mode_on,
-        "async_turn_on": lambda entity: entity.async_turn_away_mode_on,
-        "async_turn_off": lambda entity: entity.async_turn_away_mode_off,
-    },
-    {
-        "desc": SwitchEntityDescription(
-            key="boost",
-            name="Boost",
-            device_class=SwitchDeviceClass.SWITCH,
-        ),
-        "is_on": lambda entity: entity.is_boost_mode_on,
-        "async_turn_on": lambda entity: entity.async_turn_boost_mode_on,
-        "async_turn_off": lambda entity: entity.async_turn_boost_mode_off,
-    },
-)
+ENTITY_DESCRIPTIONS = platform_fields(Platform.SWITCH)
 
 
 async def async_setup_entry(
@@ -50,17 +27,8 @@ async def async_setup_entry(
     entities: list[AquantaSwitch] = []
 
     for aquanta_id in coordinator.data["devices"]:
-        for entity_info in ENTITY_DESCRIPTIONS:
-            entities.append(
-                AquantaSwitch(
-                    coordinator,
-                    aquanta_id,
-                    entity_info["desc"],
-                    entity_info["is_on"],
-                    entity_info["async_turn_on"],
-                    entity_info["async_turn_off"],
-                )
-            )
+        for compiled in ENTITY_DESCRIPTIONS:
+            entities.append(AquantaSwitch(coordinator, aquanta_id, compiled))
 
     async_add_entities(entities)
 
@@ -75,30 +43,27 @@ class AquantaSwitch(AquantaEntity, SwitchEntity):
         self,
         coordinator: AquantaCoordinator,
         aquanta_id,
-        entity_description: SwitchEntityDescription,
-        is_on_func,
-        async_turn_on_func,
-        async_turn_off_func,
+        compiled: CompiledField,
     ) -> None:
         """Initialize the switch."""
-        super().__init__(coordinator, aquanta_id)
-        self.entity_description = entity_description
-        self._attr_name = entity_description.name
-        self._is_on_func = is_on_func
-        self._async_turn_on_func = async_turn_on_func
-        self._async_turn_off_func = async_turn_off_func
-        self._attr_unique_id = self._base_unique_id + "_" + entity_description.key
+        super().__init__(coordinator, aquanta_id, compiled.endpoints)
+        self.entity_description = compiled.field.description
+        self._attr_name = self.entity_description.name
+        self._is_on_func = compiled.value
+        self._async_turn_on_func = getattr(self, compiled.field.turn_on)
+        self._async_turn_off_func = getattr(self, compiled.field.turn_off)
+        self._attr_unique_id = self._base_unique_id + "_" + self.entity_description.key
         LOGGER.debug("Created switch with unique ID %s", self._attr_unique_id)
 
     @property
     def is_on(self):
         """Return true if the switch is on."""
-        return self._is_on_func(self)
+        return self._is_on_func(self.device_data)
 
     async def async_turn_on(self, **kwargs):
         """Turn the switch on."""
-        return await self._async_turn_on_func(self)()
+        return await self._async_turn_on_func()
 
     async def async_turn_off(self, **kwargs):
         """Turn the switch off."""
-        return await self._async_turn_off_func(self)()
+        return await self._async_turn_off_func()
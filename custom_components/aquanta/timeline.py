@@ -0,0 +1,228 @@
+"""Run-length encoded mode timelines and rolling duty cycles."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Container
+from datetime import timedelta
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+import homeassistant.util.dt as dt_util
+
+from .const import DOMAIN
+from .fields import COMPILED_FIELDS
+
+_MODE_FIELD = COMPILED_FIELDS["current_mode"]
+_MODE = _MODE_FIELD.value
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 300
+
+DUTY_CYCLE_WINDOWS = {
+    "daily": timedelta(days=1),
+    "weekly": timedelta(days=7),
+}
+
+# Time between updates longer than this is recorded as an unknown mode
+MAX_GAP = timedelta(minutes=10).total_seconds()
+
+# Runs that left every window are pruned in batches of at least this many
+PRUNE_BATCH = 64
+
+
+class _Window:
+    """Seconds spent in each mode over a rolling window.
+
+    ``start`` is where the accounted time begins and ``head`` the index of
+    the run it falls in.
+    """
+
+    __slots__ = ("length", "start", "head", "totals")
+
+    def __init__(self, length: float, start: float) -> None:
+        self.length = length
+        self.start = start
+        self.head = 0
+        self.totals: defaultdict[str | None, float] = defaultdict(float)
+
+
+class DeviceTimeline:
+    """The modes of a device as runs of ``[start, mode]``.
+
+    A mode of None covers time the device was not updated for, such as Home
+    Assistant being stopped. Each update adds the time since the previous
+    one to every window and expires what fell out of it, so duty cycles cost
+    amortized O(1) per update however long the timeline is.
+    """
+
+    def __init__(self, runs: list | None = None, updated: float | None = None) -> None:
+        """Initialize the timeline, replaying any saved runs."""
+        self.runs: list[list] = []
+        self.updated: float | None = None
+        self._windows = {
+            name: _Window(length.total_seconds(), 0.0)
+            for name, length in DUTY_CYCLE_WINDOWS.items()
+        }
+
+        for start, mode in runs or ():
+            self._advance(start, mode)
+        if self.runs and updated is not None:
+            self._advance(updated, self.runs[-1][1])
+
+    def advance(self, now: float, mode: str | None) -> None:
+        """Account the time up to now and record the mode the device is in."""
+        if self.updated is not None and now - self.updated > MAX_GAP:
+            self._append(self.updated, None)
+        self._advance(now, mode)
+
+    def _advance(self, now: float, mode: str | None) -> None:
+        if self.updated is None:
+            self._append(now, mode)
+            self.updated = now
+            for window in self._windows.values():
+                window.start = now
+            return
+
+        elapsed = now - self.updated
+        if elapsed < 0:
+            return
+
+        current = self.runs[-1][1]
+        for window in self._windows.values():
+            window.totals[current] += elapsed
+        self.updated = now
+
+        if mode != current:
+            self._append(now, mode)
+
+        for window in self._windows.values():
+            self._expire(window, now)
+
+        self._prune()
+
+    def _append(self, start: float, mode: str | None) -> None:
+        if self.runs and self.runs[-1][0] == start:
+            self.runs[-1][1] = mode
+        else:
+            self.runs.append([start, mode])
+
+    def _expire(self, window: _Window, now: float) -> None:
+        """Drop the time that fell out of a window."""
+        target = now - window.length
+        runs = self.runs
+
+        while window.start < target:
+            mode = runs[window.head][1]
+            if window.head + 1 < len(runs):
+                end = runs[window.head + 1][0]
+            else:
+                end = now
+
+            cut = min(target, end)
+            window.totals[mode] -= cut - window.start
+            window.start = cut
+            if cut >= end:
+                window.head += 1
+
+    def _prune(self) -> None:
+        """Drop the runs every window has left behind."""
+        head = min(window.head for window in self._windows.values())
+        if head < PRUNE_BATCH:
+            return
+
+        del self.runs[:head]
+        for window in self._windows.values():
+            window.head -= head
+
+    def duty_cycle(self, window: str, mode: str) -> float | None:
+        """Return the percentage of known time spent in a mode in a window."""
+        totals = self._windows[window].totals
+        known = sum(totals.values()) - totals[None]
+        if known <= 0:
+            return None
+        return max(0.0, min(100.0, totals[mode] / known * 100))
+
+    def as_dict(self) -> dict:
+        """Return the timeline for storage."""
+        return {"updated": self.updated, "runs": self.runs}
+
+
+class AquantaTimeline:
+    """Persisted mode timelines of the devices of an Aquanta account."""
+
+    # Endpoints the timeline reads from every device
+    endpoints = _MODE_FIELD.endpoints
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the timeline."""
+        self._store: Store[dict] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.timeline.{entry_id}"
+        )
+        self._devices: dict[str, DeviceTimeline] = {}
+        self._listeners: list[CALLBACK_TYPE] = []
+
+    async def async_load(self) -> None:
+        """Load the saved timelines."""
+        data = await self._store.async_load() or {}
+        self._devices = {
+            aquanta_id: DeviceTimeline(saved["runs"], saved["updated"])
+            for aquanta_id, saved in data.get("devices", {}).items()
+        }
+
+    async def async_save(self) -> None:
+        """Save the timelines now."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Delete the saved timelines."""
+        await self._store.async_remove()
+
+    def _data_to_save(self) -> dict:
+        return {
+            "devices": {
+                aquanta_id: timeline.as_dict()
+                for aquanta_id, timeline in self._devices.items()
+            }
+        }
+
+    @callback
+    def async_update(self, data: dict, failing: Container[tuple] = ()) -> None:
+        """Record the current mode of every device in an account snapshot.
+
+        Devices whose info endpoint is failing are recorded in an unknown
+        mode, as the one in the snapshot is stale.
+        """
+        now = dt_util.utcnow().timestamp()
+
+        for aquanta_id, device in data["devices"].items():
+            timeline = self._devices.get(str(aquanta_id))
+            if timeline is None:
+                timeline = self._devices[str(aquanta_id)] = DeviceTimeline()
+            if (aquanta_id, "info") in failing:
+                timeline.advance(now, None)
+            else:
+                timeline.advance(now, _MODE(device))
+
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def duty_cycle(self, aquanta_id, window: str, mode: str) -> float | None:
+        """Return the percentage of time a device spent in a mode in a window."""
+        timeline = self._devices.get(str(aquanta_id))
+        if timeline is None:
+            return None
+        return timeline.duty_cycle(window, mode)
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for timeline updates; returns a callback that stops listening."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import math
+
 from homeassistant.components.water_heater import (
     STATE_ECO,
     STATE_PERFORMANCE,
@@ -10,12 +12,26 @@ from homeassistant.components.water_heater import (
     WaterHeaterEntityFeature,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfTemperature
+from homeassistant.const import ATTR_TEMPERATURE, UnitOfTemperature
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .entity import AquantaEntity
-from .const import DOMAIN, LOGGER
+from .const import (
+    CONF_SET_POINT_CONTROL,
+    DOMAIN,
+    LOGGER,
+    SET_POINT_COOLDOWN,
+    SET_POINT_MAX,
+    SET_POINT_MIN,
+)
+from .fields import COMPILED_FIELDS
+
+_CURRENT_TEMPERATURE = COMPILED_FIELDS["current_temperature"].value
+_OPERATION = COMPILED_FIELDS["operation"].value
+_SET_POINT = COMPILED_FIELDS["set_point"].value
 
 
 async def async_setup_entry(
@@ -30,69 +46,131 @@ async def async_setup_entry(
 
     for aquanta_id in coordinator.data["devices"]:
         entities.append(
-            AquantaWaterHeater(coordinator, aquanta_id)
+            AquantaWaterHeater(
+                coordinator,
+                aquanta_id,
+                set_point_control=config_entry.options.get(
+                    CONF_SET_POINT_CONTROL, False
+                ),
+            )
         )
 
     async_add_entities(entities)
 
+
 class AquantaWaterHeater(AquantaEntity, WaterHeaterEntity):
-    """Representation of an Aquanta water heater controller."""
+    """Representation of an Aquanta water heater controller.
+
+    With set_point_control, target temperature changes are applied
+    optimistically and sent once they have stayed unchanged for
+    SET_POINT_COOLDOWN seconds, so dragging the thermostat slider makes a
+    single API call with the final value. The optimistic value is kept until
+    a refresh of the advanced endpoint reports the device's set point; if
+    that does not match, the change is treated as failed.
+    """
 
     _attr_has_entity_name = True
     _attr_supported_features = WaterHeaterEntityFeature.AWAY_MODE
     _attr_temperature_unit = UnitOfTemperature.CELSIUS
+    _attr_min_temp = SET_POINT_MIN
+    _attr_max_temp = SET_POINT_MAX
     _attr_operation_list = [STATE_ECO, STATE_PERFORMANCE, STATE_OFF]
     _attr_name = "Water heater"
 
-    def __init__(self, coordinator, aquanta_id) -> None:
+    def __init__(self, coordinator, aquanta_id, set_point_control=False) -> None:
         """Initialize the water heater."""
         super().__init__(coordinator, aquanta_id)
+        self._set_point_control = set_point_control
+        if set_point_control:
+            self._attr_supported_features |= WaterHeaterEntityFeature.TARGET_TEMPERATURE
         self._attr_name = "Water heater"
         self._attr_unique_id = self._base_unique_id + "_water_heater"
+        self._pending_set_point: float | None = None
+        self._set_point_debouncer: Debouncer | None = None
         LOGGER.debug("Created water heater with unique ID %s", self._attr_unique_id)
 
+    async def async_added_to_hass(self) -> None:
+        """Set up the set point debouncer when added to hass."""
+        await super().async_added_to_hass()
+        self._set_point_debouncer = Debouncer(
+            self.hass,
+            LOGGER,
+            cooldown=SET_POINT_COOLDOWN,
+            immediate=False,
+            function=self._async_send_set_point,
+        )
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Drop any unsent set point when removed from hass."""
+        await super().async_will_remove_from_hass()
+        if self._set_point_debouncer is not None:
+            await self._set_point_debouncer.async_shutdown()
+
     @property
     def current_temperature(self):
         """Return the current temperature."""
-        return self.coordinator.data["devices"][self.aquanta_id]["water"]["temperature"]
+        return _CURRENT_TEMPERATURE(self.device_data)
 
     @property
     def current_operation(self):
         """Return current operation ie. eco, performance, off."""
-        operation = STATE_OFF
-
-        if (
-            self.coordinator.data["devices"][self.aquanta_id]["info"]["currentMode"][
-                "type"
-            ]
-            != "off"
-        ):
-            found = False
-
-            for record in self.coordinator.data["devices"][self.aquanta_id]["info"][
-                "records"
-            ]:
-                if record["type"] == "boost" and record["state"] == "ongoing":
-                    operation = STATE_PERFORMANCE
-                    found = True
-                elif record["type"] == "away" and record["state"] == "ongoing":
-                    operation = STATE_OFF
-                    found = True
-                    break
-
-            if not found:
-                operation = STATE_ECO
-
-        return operation
+        return _OPERATION(self.device_data)
 
     @property
     def target_temperature(self):
         """Return the temperature we try to reach."""
-        if self.coordinator.data["devices"][self.aquanta_id]["advanced"][
-            "thermostatEnabled"
-        ]:
-            return self.coordinator.data["devices"][self.aquanta_id]["advanced"][
-                "setPoint"
-            ]
-        else:
-            return None
+        if self._pending_set_point is not None:
+            return self._pending_set_point
+        return _SET_POINT(self.device_data)
+
+    async def async_set_temperature(self, **kwargs) -> None:
+        """Set the target temperature once it stops changing."""
+        # The service is not gated on the supported features
+        if not self._set_point_control:
+            raise ServiceValidationError(
+                f"Setting the target temperature of {self.entity_id} is disabled;"
+                " enable set point control in the integration options"
+            )
+
+        self._pending_set_point = kwargs[ATTR_TEMPERATURE]
+        self.async_write_ha_state()
+
+        # Restart the cooldown so only the value the user settles on is sent
+        self._set_point_debouncer.async_cancel()
+        await self._set_point_debouncer.async_call()
+
+    async def _async_send_set_point(self) -> None:
+        """Send the pending set point and confirm it with a targeted refresh."""
+        # Values set while a send is in flight are sent straight after it
+        while (value := self._pending_set_point) is not None:
+            try:
+                await self.coordinator.executor.async_run(
+                    self.coordinator.api.set_set_point, self.aquanta_id, value
+                )
+            except RuntimeError as exception:
+                LOGGER.error(
+                    "Failed to set the target temperature of %s: %s",
+                    self.entity_id,
+                    exception,
+                )
+                if self._pending_set_point == value:
+                    self._pending_set_point = None
+                    self.async_write_ha_state()
+                continue
+
+            await self.coordinator.async_refresh_device(self.aquanta_id, {"advanced"})
+
+            if self._pending_set_point != value:
+                continue
+
+            reported = _SET_POINT(self.device_data)
+            # The API reports the set point to a tenth of a degree
+            if reported is None or not math.isclose(reported, value, abs_tol=0.05):
+                LOGGER.error(
+                    "Target temperature of %s not confirmed: set %s, device reports %s",
+                    self.entity_id,
+                    value,
+                    reported,
+                )
+            self._pending_set_point = None
+            self.async_write_ha_state()
@@ -0,0 +1,261 @@
+"""Shared helpers for aquanta tests."""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import re
+import threading
+import time
+from unittest.mock import patch
+
+from aquanta import Aquanta
+from aquanta.aquanta import AquantaHelper
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+import numpy as np
+import requests
+
+MOCK_PASSWORD = "test_password"
+
+HOUR = 3600
+DAY = 24 * HOUR
+MONDAY = datetime(2026, 10, 19, tzinfo=timezone.utc).timestamp()
+
+
+def morning_showers(
+    days: int, start: float = MONDAY
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return samples of a tank drained from 90% to 50% between 7 and 8 daily.
+
+    start is a UTC midnight.
+    """
+    times = start + np.arange(0, days * DAY, 300, dtype=float)
+    hours = (times - start) % DAY / HOUR
+    values = np.select(
+        [hours < 7, hours < 8, hours < 10],
+        [90, 90 - 40 * (hours - 7), 50 + 20 * (hours - 8)],
+        90,
+    )
+    return times, values
+
+
+class MockAquantaCloud:
+    """A local stand-in for the Aquanta cloud API serving many accounts.
+
+    Register it on a requests_mock Mocker; the real blocking client then logs
+    in and fetches from it without leaving the process. Account ``n`` owns
+    device IDs ``n * 1000 + 1`` to ``n * 1000 + devices``; the endpoints of
+    devices in ``failing`` return server errors and those of devices in
+    ``hanging`` time out.
+    """
+
+    def __init__(self, accounts: int, devices: int) -> None:
+        """Initialize the stand-in."""
+        self.accounts = accounts
+        self.devices = devices
+        self.tick = 0
+        self.generation = 0
+        self.failing: set[int] = set()
+        # Devices whose endpoints time out, after hang seconds
+        self.hanging: set[int] = set()
+        self.hang = 0.0
+        # (device, "away" or "boost") -> the start and end it was set to
+        self.schedules: dict[tuple[int, str], dict] = {}
+        self.logins = 0
+        self.requests = 0
+
+    @staticmethod
+    def username(account: int) -> str:
+        """Return the username of an account."""
+        return f"user{account}@example.com"
+
+    def entry_data(self, account: int) -> dict:
+        """Return config entry data for an account."""
+        return {CONF_USERNAME: self.username(account), CONF_PASSWORD: MOCK_PASSWORD}
+
+    def device_ids(self, account: int) -> list[int]:
+        """Return the device IDs of an account."""
+        return [account * 1000 + device for device in range(1, self.devices + 1)]
+
+    def advance(self) -> None:
+        """Move the simulated water heaters on so the next payloads change."""
+        self.tick += 1
+
+    def expire(self) -> None:
+        """Expire every session issued so far."""
+        self.generation += 1
+
+    def register(self, mocker) -> None:
+        """Register the stand-in endpoints on a requests_mock Mocker."""
+        api = re.escape(AquantaHelper.API_BASE)
+        mocker.post(
+            re.compile(re.escape(Aquanta.GOOGLE_APIS) + r"/verifyPassword"),
+            json=self._verify_password,
+        )
+        mocker.get(re.compile(api + r"/auth\?idtoken=(\d+)$"), json=self._auth)
+        mocker.get(re.compile(api + r"/v2/devices$"), json=self._devices)
+        mocker.get(
+            re.compile(api + r"/v2/devices/(\d+)/(\w+)$"), content=self._endpoint
+        )
+        schedule = re.compile(api + r"/v2/devices/(\d+)/(away|boost)$")
+        mocker.put(schedule, json=self._schedule)
+        mocker.delete(schedule, json=self._schedule)
+
+    @contextmanager
+    def serve(self) -> Iterator[str]:
+        """Serve the stand-in over HTTP on localhost and point the client at it.
+
+        Unlike register(), requests go through real sockets, so connections
+        the client leaves open can be observed. Yields the server's URL.
+        """
+        cloud = self
+        routes = (
+            ("POST", re.compile(r"/google/verifyPassword"), cloud._verify_password),
+            ("GET", re.compile(r"/api/auth\?idtoken=(\d+)$"), cloud._auth),
+            ("GET", re.compile(r"/api/v2/devices$"), cloud._devices),
+            ("GET", re.compile(r"/api/v2/devices/(\d+)/(\w+)$"), cloud._endpoint),
+        )
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep connections alive like the real API, but not forever
+            protocol_version = "HTTP/1.1"
+            timeout = 5
+
+            def do_GET(self):
+                self._handle()
+
+            def do_POST(self):
+                self._handle()
+
+            def _handle(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                request = _Request(self.path, self.headers, body)
+                context = _Context()
+                for method, pattern, handler in routes:
+                    if method == self.command and pattern.match(self.path):
+                        content = handler(request, context)
+                        break
+                else:
+                    context.status_code, content = 404, b""
+
+                if not isinstance(content, bytes):
+                    content = json.dumps(content).encode()
+                self.send_response(context.status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        # Join connection threads on close so none outlive the test
+        server.daemon_threads = False
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_port}"
+
+        try:
+            with patch.object(Aquanta, "GOOGLE_APIS", f"{url}/google"), patch.object(
+                AquantaHelper, "API_BASE", f"{url}/api"
+            ):
+                yield url
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    def _account(self, request, context) -> int | None:
+        """Return the account of a request, or None if its session expired."""
+        self.requests += 1
+        account, generation = map(
+            int, request.headers["Authorization"].removeprefix("Bearer key-").split(".")
+        )
+        if generation != self.generation:
+            context.status_code = 401
+            return None
+        return account
+
+    def _verify_password(self, request, context):
+        body = request.json()
+        account = int(re.match(r"user(\d+)@", body["email"]).group(1))
+        if body["password"] != MOCK_PASSWORD or account >= self.accounts:
+            context.status_code = 400
+            return {}
+        self.logins += 1
+        return {"idToken": str(account)}
+
+    def _auth(self, request, context):
+        account = request.path_url.rsplit("=", 1)[1]
+        return {"apiKey": f"key-{account}.{self.generation}"}
+
+    def _devices(self, request, context):
+        if (account := self._account(request, context)) is None:
+            return {}
+        return [{"id": device} for device in self.device_ids(account)]
+
+    def _endpoint(self, request, context):
+        if self._account(request, context) is None:
+            return b""
+        device, endpoint = request.path_url.rsplit("/", 2)[1:]
+        if int(device) in self.failing:
+            context.status_code = 500
+            return b""
+        if int(device) in self.hanging:
+            time.sleep(self.hang)
+            raise requests.exceptions.ReadTimeout(f"Read timed out ({self.hang}s)")
+        return json.dumps(self.payload(int(device), endpoint)).encode()
+
+    def _schedule(self, request, context):
+        if self._account(request, context) is None:
+            return {}
+        device, mode = request.path_url.rsplit("/", 2)[1:]
+        if request.method == "PUT":
+            self.schedules[(int(device), mode)] = request.json()
+        else:
+            self.schedules.pop((int(device), mode), None)
+        return {}
+
+    def payload(self, device: int, endpoint: str) -> dict:
+        """Return the simulated payload of a device endpoint."""
+        phase = (device + self.tick) % 10
+
+        if endpoint == "water":
+            return {"temperature": 48 + phase * 0.5, "available": 1 - phase / 20}
+        if endpoint == "infocenter":
+            return {
+                "title": f"Water Heater {device}",
+                "currentMode": {"type": "boost" if phase == 0 else "intelligence"},
+                "records": [
+                    {"type": "intelligence", "state": "ongoing"},
+                    {"type": "boost", "state": "ongoing" if phase == 0 else "ended"},
+                ],
+            }
+        return {
+            "controlEnabled": True,
+            "intelEnabled": True,
+            "thermostatEnabled": True,
+            "touEnabled": False,
+            "timerEnabled": False,
+            "setPoint": 54.4,
+        }
+
+
+class _Request:
+    """The parts of a requests_mock request the stand-in handlers use."""
+
+    def __init__(self, path_url: str, headers, body: bytes) -> None:
+        self.path_url = path_url
+        self.headers = headers
+        self._body = body
+
+    def json(self):
+        return json.loads(self._body)
+
+
+class _Context:
+    """The parts of a requests_mock response context the handlers use."""
+
+    status_code = 200
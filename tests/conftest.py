@@ -17,6 +17,9 @@
 from unittest.mock import patch
 
 import pytest
+from pytest_homeassistant_custom_component.common import load_fixture
+
+from .const import MOCK_DEVICE_ID
 
 pytest_plugins = "pytest_homeassistant_custom_component"
 
@@ -38,3 +41,47 @@ def skip_notifications_fixture():
     ha_mod = "homeassistant.components.persistent_notification"
     with patch(f"{ha_mod}.async_create"), patch(f"{ha_mod}.async_dismiss"):
         yield
+
+
+# This fixture holds the raw endpoint payloads served to the coordinator. Tests
+# can replace entries to simulate the API returning different data.
+@pytest.fixture(name="mock_payloads")
+def mock_payloads_fixture():
+    """Return the raw endpoint payloads for the mock device."""
+    return {
+        "water": load_fixture("water.json").encode(),
+        "info": load_fixture("infocenter.json").encode(),
+        "advanced": load_fixture("advanced.json").encode(),
+    }
+
+
+# This fixture, when used, will result in the Aquanta login being skipped and
+# the endpoint fixtures being served for a single mock device.
+@pytest.fixture(name="bypass_get_data")
+def bypass_get_data_fixture(mock_payloads):
+    """Skip the Aquanta login and serve the endpoint fixtures."""
+    with patch("custom_components.aquanta.Aquanta"), patch(
+        "custom_components.aquanta.config_flow.Aquanta"
+    ), patch(
+        "custom_components.aquanta.api.AquantaApiClient.device_ids",
+        return_value=[MOCK_DEVICE_ID],
+    ), patch(
+        "custom_components.aquanta.api.AquantaApiClient.fetch",
+        side_effect=lambda aquanta_id, key: mock_payloads[key],
+    ) as mock_fetch:
+        yield mock_fetch
+
+
+# In this fixture, we are forcing the Aquanta login and API calls to raise an
+# exception. This is useful for exception handling.
+@pytest.fixture(name="error_on_get_data")
+def error_on_get_data_fixture():
+    """Simulate errors when logging in or retrieving data from the API."""
+    with patch("custom_components.aquanta.Aquanta"), patch(
+        "custom_components.aquanta.config_flow.Aquanta",
+        side_effect=RuntimeError("Aquanta: Password verification failed"),
+    ), patch(
+        "custom_components.aquanta.api.AquantaApiClient.device_ids",
+        side_effect=RuntimeError("Aquanta: Failed to GET /v2/devices"),
+    ):
+        yield
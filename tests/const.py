@@ -3,3 +3,5 @@ from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
 
 # Mock config data to be used across multiple tests
 MOCK_CONFIG = {CONF_USERNAME: "test_username", CONF_PASSWORD: "test_password"}
+
+MOCK_DEVICE_ID = 12345
@@ -0,0 +1,151 @@
+"""Test the aquanta API client sessions."""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import re
+import threading
+from unittest.mock import patch
+
+from aquanta import Aquanta
+import homeassistant.util.dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+import requests_mock
+
+from custom_components.aquanta.api import AquantaApiClient
+from custom_components.aquanta.const import DOMAIN
+
+from .common import MOCK_PASSWORD, MockAquantaCloud
+from .const import MOCK_CONFIG
+
+
+def test_expired_session_logs_in_once():
+    """Test that concurrent requests hitting an expired session share one login."""
+    cloud = MockAquantaCloud(1, 4)
+
+    with requests_mock.Mocker() as mocker:
+        cloud.register(mocker)
+        client = AquantaApiClient(
+            Aquanta(cloud.username(0), MOCK_PASSWORD), cloud.username(0), MOCK_PASSWORD
+        )
+        cloud.expire()
+
+        # Hold every rejected request until all of them have been rejected
+        barrier = threading.Barrier(cloud.devices)
+        relogin = client.relogin
+
+        def wait_then_relogin(expired):
+            barrier.wait(timeout=5)
+            relogin(expired)
+
+        with (
+            patch.object(client, "relogin", wait_then_relogin),
+            ThreadPoolExecutor(cloud.devices) as pool,
+        ):
+            payloads = list(
+                pool.map(
+                    lambda device: client.fetch(device, "water"), cloud.device_ids(0)
+                )
+            )
+
+    assert all(payloads)
+    assert cloud.logins == 2
+
+
+def test_expired_session_renewed_for_schedules():
+    """Test that away and boost writes log in again when the session expired."""
+    cloud = MockAquantaCloud(1, 1)
+    (device,) = cloud.device_ids(0)
+
+    with requests_mock.Mocker() as mocker:
+        cloud.register(mocker)
+        client = AquantaApiClient(
+            Aquanta(cloud.username(0), MOCK_PASSWORD), cloud.username(0), MOCK_PASSWORD
+        )
+
+        cloud.expire()
+        client.set_boost(device, "2026-01-01T00:00:00.000Z", "2026-01-01T00:30:00.000Z")
+        assert cloud.schedules == {
+            (device, "boost"): {
+                "start": "2026-01-01T00:00:00.000Z",
+                "end": "2026-01-01T00:30:00.000Z",
+            }
+        }
+        assert cloud.logins == 2
+
+        cloud.expire()
+        client.delete_boost(device)
+        assert not cloud.schedules
+        assert cloud.logins == 3
+
+
+def test_set_point_keeps_other_settings():
+    """Test that setting the set point writes back every advanced setting."""
+    cloud = MockAquantaCloud(1, 1)
+    (device,) = cloud.device_ids(0)
+
+    with requests_mock.Mocker() as mocker:
+        cloud.register(mocker)
+        put = mocker.put(re.compile(r".*/v2/devices/\d+/advanced$"))
+        client = AquantaApiClient(Aquanta(cloud.username(0), MOCK_PASSWORD))
+        client.set_set_point(device, 57.0)
+
+    assert put.call_count == 1
+    assert put.last_request.json() == {
+        **cloud.payload(device, "advanced"),
+        "setPoint": 57.0,
+    }
+
+
+async def test_expired_session_does_not_fail_refresh(hass):
+    """Test that a refresh survives the session expiring."""
+    cloud = MockAquantaCloud(1, 1)
+    config_entry = MockConfigEntry(
+        domain=DOMAIN, data=cloud.entry_data(0), unique_id=cloud.username(0)
+    )
+    config_entry.add_to_hass(hass)
+
+    with requests_mock.Mocker() as mocker:
+        cloud.register(mocker)
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+        coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+        cloud.expire()
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success
+        assert cloud.logins == 2
+
+        assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_session_renewed_before_expiry(hass, bypass_get_data, freezer):
+    """Test that the session is renewed in the background ahead of expiry."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    def relogin(expired=None):
+        coordinator.api.authenticated_at = dt_util.utcnow()
+
+    with patch.object(AquantaApiClient, "relogin", side_effect=relogin) as mock_relogin:
+        freezer.tick(timedelta(minutes=50))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+        mock_relogin.assert_not_called()
+
+        freezer.tick(timedelta(minutes=6))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+        mock_relogin.assert_called_once()
+
+        # The next renewal is due a lifetime after this one
+        freezer.tick(timedelta(minutes=50))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+        mock_relogin.assert_called_once()
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
@@ -0,0 +1,62 @@
+"""Test aquanta traffic capture and replay."""
+
+import json
+import math
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+import requests_mock
+
+from custom_components.aquanta.capture import REDACTED, AquantaReplayClient
+from custom_components.aquanta.const import ATTR_CYCLES, DOMAIN, SERVICE_CAPTURE
+from custom_components.aquanta.coordinator import AquantaCoordinator
+from custom_components.aquanta.executor import AquantaExecutor
+
+from .common import MockAquantaCloud
+
+
+async def test_capture_and_replay(hass, tmp_path):
+    """Test that captured traffic is redacted and replays into a coordinator."""
+    hass.config.config_dir = str(tmp_path)
+    cloud = MockAquantaCloud(1, 2)
+    config_entry = MockConfigEntry(
+        domain=DOMAIN, data=cloud.entry_data(0), unique_id=cloud.username(0)
+    )
+    config_entry.add_to_hass(hass)
+
+    with requests_mock.Mocker() as mocker:
+        cloud.register(mocker)
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+        coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+        await hass.services.async_call(
+            DOMAIN, SERVICE_CAPTURE, {ATTR_CYCLES: 2}, blocking=True
+        )
+        for _ in range(2):
+            cloud.advance()
+            await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        assert coordinator.api.recorder is None
+
+        assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+    path = next(tmp_path.glob(f"aquanta_capture.{config_entry.entry_id}.*.json"))
+    capture = json.loads(path.read_text())
+    assert capture["cycles"] == 2
+    assert len(capture["responses"]) == 2 * 2 * 3
+    assert {response["device"] for response in capture["responses"]} == {1, 2}
+    assert all(
+        response["body"]["title"] == REDACTED
+        for response in capture["responses"]
+        if response["endpoint"] == "info"
+    )
+
+    replay = AquantaReplayClient(str(path), speed=math.inf)
+    executor = AquantaExecutor(hass)
+    coordinator = AquantaCoordinator(hass, None, "replay", executor, api=replay)
+    await coordinator.async_refresh()
+
+    cloud.tick = 1
+    assert coordinator.data["devices"][1]["water"] == cloud.payload(1001, "water")
+    assert coordinator.data["devices"][2]["info"]["title"] == REDACTED
+
+    await coordinator.async_shutdown()
@@ -2,9 +2,18 @@
 from unittest.mock import patch
 
 from homeassistant import config_entries, data_entry_flow
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
 import pytest
 
-from custom_components.aquanta.const import DOMAIN
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.aquanta.const import (
+    CONF_AUTO_BOOST,
+    CONF_SET_POINT_CONTROL,
+    CONF_STALE_GRACE,
+    DATA_SESSIONS,
+    DOMAIN,
+)
 
 from .const import MOCK_CONFIG
 
@@ -16,9 +25,6 @@ from .const import MOCK_CONFIG
 def bypass_setup_fixture():
     """Prevent setup."""
     with patch(
-        "custom_components.aquanta.async_setup",
-        return_value=True,
-    ), patch(
         "custom_components.aquanta.async_setup_entry",
         return_value=True,
     ):
@@ -52,6 +58,67 @@ async def test_successful_config_flow(hass, bypass_get_data):
     assert result["data"] == MOCK_CONFIG
     assert result["result"]
 
+    # The logged-in session is kept for entry setup to reuse
+    assert MOCK_CONFIG[CONF_USERNAME] in hass.data[DATA_SESSIONS]
+
+
+async def test_duplicate_config_flow_closes_session(hass, bypass_get_data):
+    """Test that adding an account twice does not keep its session."""
+    MockConfigEntry(
+        domain=DOMAIN, data=MOCK_CONFIG, unique_id=MOCK_CONFIG[CONF_USERNAME]
+    ).add_to_hass(hass)
+
+    with patch("custom_components.aquanta.config_flow.Aquanta") as mock_aquanta:
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN, context={"source": config_entries.SOURCE_USER}
+        )
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], user_input=MOCK_CONFIG
+        )
+
+    assert result["type"] == data_entry_flow.RESULT_TYPE_ABORT
+    assert result["reason"] == "already_configured"
+    assert MOCK_CONFIG[CONF_USERNAME] not in hass.data.get(DATA_SESSIONS, {})
+    mock_aquanta.return_value._session.close.assert_called_once()
+
+
+async def test_reauth_flow_reloads_failed_entry(hass, bypass_get_data):
+    """Test that reauth reloads an entry that failed with the flow's session."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={**MOCK_CONFIG, CONF_PASSWORD: "old_password"},
+        unique_id=MOCK_CONFIG[CONF_USERNAME],
+        state=config_entries.ConfigEntryState.SETUP_ERROR,
+    )
+    config_entry.add_to_hass(hass)
+
+    with patch("custom_components.aquanta.config_flow.Aquanta") as mock_aquanta:
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={
+                "source": config_entries.SOURCE_REAUTH,
+                "entry_id": config_entry.entry_id,
+            },
+            data=config_entry.data,
+        )
+        assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+        assert result["step_id"] == "user"
+
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], user_input=MOCK_CONFIG
+        )
+        await hass.async_block_till_done()
+
+    assert result["type"] == data_entry_flow.RESULT_TYPE_ABORT
+    assert result["reason"] == "reauth_successful"
+    assert config_entry.data == MOCK_CONFIG
+    assert config_entry.state is config_entries.ConfigEntryState.LOADED
+    # Setup is bypassed here, so nothing took the session over
+    assert hass.data[DATA_SESSIONS][MOCK_CONFIG[CONF_USERNAME]] is (
+        mock_aquanta.return_value
+    )
+    mock_aquanta.return_value._session.close.assert_not_called()
+
 
 # In this case, we want to simulate a failure during the config flow.
 # We use the `error_on_get_data` mock instead of `bypass_get_data`
@@ -72,3 +139,28 @@ async def test_failed_config_flow(hass, error_on_get_data):
 
     assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
     assert result["errors"] == {"base": "auth"}
+
+
+async def test_options_flow(hass):
+    """Test setting the grace period, auto boost and set point control."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["step_id"] == "init"
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            CONF_STALE_GRACE: 15,
+            CONF_AUTO_BOOST: True,
+            CONF_SET_POINT_CONTROL: True,
+        },
+    )
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert config_entry.options == {
+        CONF_STALE_GRACE: 15,
+        CONF_AUTO_BOOST: True,
+        CONF_SET_POINT_CONTROL: True,
+    }
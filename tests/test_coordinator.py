@@ -0,0 +1,360 @@
+"""Test the aquanta data update coordinator."""
+
+from datetime import timedelta
+import threading
+from unittest.mock import Mock, patch
+
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_capture_events,
+    load_fixture,
+)
+import requests_mock
+
+from custom_components.aquanta.const import CONF_STALE_GRACE, DOMAIN
+from custom_components.aquanta.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.aquanta.events import (
+    EVENT_BOOST_ENDED,
+    EVENT_HOT_WATER_LOW,
+    EVENT_MODE_CHANGED,
+)
+
+from .common import MockAquantaCloud
+from .const import MOCK_CONFIG, MOCK_DEVICE_ID
+
+
+async def test_unchanged_payloads_skip_listeners(hass, bypass_get_data, mock_payloads):
+    """Test that identical responses reuse the snapshot and notify nobody."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    data = coordinator.data
+    listener = Mock()
+    coordinator.async_add_listener(listener)
+
+    # Nothing changed, so the previous snapshot is kept and listeners are skipped
+    await coordinator.async_refresh()
+    assert coordinator.data is data
+    listener.assert_not_called()
+    assert coordinator.fingerprint_stats()["hits"] == 3
+
+    # Only the water endpoint changed, so only it is decoded again
+    mock_payloads["water"] = b'{"temperature": 49.0, "available": 0.5}'
+    await coordinator.async_refresh()
+    device = coordinator.data["devices"][MOCK_DEVICE_ID]
+    assert coordinator.data is not data
+    assert device["water"]["temperature"] == 49.0
+    assert device["info"] is data["devices"][MOCK_DEVICE_ID]["info"]
+    listener.assert_called_once()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, config_entry)
+    assert diagnostics["fingerprints"] == {"hits": 5, "misses": 4, "hit_rate": 5 / 9}
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_discarded_snapshot_keeps_fingerprints(
+    hass, bypass_get_data, mock_payloads
+):
+    """Test that a refresh that fails midway does not poison the cache."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    # The water payload is read, then the refresh fails and is thrown away
+    mock_payloads["water"] = b'{"temperature": 61.0, "available": 0.5}'
+    mock_payloads["info"] = b"<html>"
+    await coordinator.async_refresh()
+    assert not coordinator.last_update_success
+    assert coordinator.data["devices"][MOCK_DEVICE_ID]["water"]["temperature"] == 52.5
+
+    mock_payloads["info"] = load_fixture("infocenter.json").encode()
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.data["devices"][MOCK_DEVICE_ID]["water"]["temperature"] == 61.0
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_timed_out_fetch_keeps_failures(hass, bypass_get_data, mock_payloads):
+    """Test that a fetch outliving its refresh does not record its failures."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    release = threading.Event()
+    finished = threading.Event()
+    get_device_data = coordinator.get_device_data
+
+    def fetch(aquanta_id, key):
+        if key == "info":
+            release.wait(5)
+            raise RuntimeError("Aquanta: Failed to GET info")
+        return mock_payloads[key]
+
+    def fetch_and_finish(plan):
+        try:
+            return get_device_data(plan)
+        finally:
+            finished.set()
+
+    bypass_get_data.side_effect = fetch
+    with (
+        patch.object(coordinator, "get_device_data", side_effect=fetch_and_finish),
+        patch.object(coordinator, "_refresh_timeout", return_value=0.1),
+    ):
+        await coordinator.async_refresh()
+        assert not coordinator.last_update_success
+
+        # The worker finishes after its refresh has been given up on
+        release.set()
+        assert await hass.async_add_executor_job(finished.wait, 5)
+
+    assert not coordinator.endpoint_failures()
+
+    bypass_get_data.side_effect = lambda aquanta_id, key: mock_payloads[key]
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert not coordinator.endpoint_failures()
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_fetch_plan_follows_enabled_entities(hass, bypass_get_data):
+    """Test that endpoints only disabled entities need are not fetched."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    assert coordinator.fetch_plan() == {MOCK_DEVICE_ID: {"water", "info", "advanced"}}
+
+    registry = er.async_get(hass)
+    for entry in er.async_entries_for_config_entry(registry, config_entry.entry_id):
+        if entry.domain in ("binary_sensor", "water_heater") or entry.entity_id == (
+            "sensor.water_heater_set_point"
+        ):
+            registry.async_update_entity(
+                entry.entity_id, disabled_by=er.RegistryEntryDisabler.USER
+            )
+    await hass.async_block_till_done()
+
+    assert coordinator.fetch_plan() == {MOCK_DEVICE_ID: {"water", "info"}}
+
+    bypass_get_data.reset_mock()
+    await coordinator.async_refresh()
+    assert {call.args[1] for call in bypass_get_data.call_args_list} == {
+        "water",
+        "info",
+    }
+    assert "advanced" in coordinator.data["devices"][MOCK_DEVICE_ID]
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_fetch_plan_keeps_coordinator_endpoints(
+    hass, bypass_get_data, mock_payloads
+):
+    """Test that events, timeline and forecast data is fetched without entities."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    registry = er.async_get(hass)
+    for entry in er.async_entries_for_config_entry(registry, config_entry.entry_id):
+        if entry.entity_id != "sensor.water_heater_set_point":
+            registry.async_update_entity(
+                entry.entity_id, disabled_by=er.RegistryEntryDisabler.USER
+            )
+    await hass.async_block_till_done()
+
+    assert coordinator.fetch_plan() == {MOCK_DEVICE_ID: {"water", "info", "advanced"}}
+
+    mode_events = async_capture_events(hass, EVENT_MODE_CHANGED)
+    mock_payloads["info"] = (
+        b'{"currentMode": {"type": "boost"},'
+        b' "records": [{"type": "boost", "state": "ongoing"}]}'
+    )
+    mock_payloads["water"] = b'{"temperature": 45.0, "available": 0.2}'
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert [event.data["new_value"] for event in mode_events] == ["boost"]
+    assert coordinator.data["devices"][MOCK_DEVICE_ID]["water"]["available"] == 0.2
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_transition_events(hass, bypass_get_data, mock_payloads):
+    """Test that snapshot transitions fire events with old and new values."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    device = dr.async_get(hass).async_get_device(
+        identifiers={(DOMAIN, f"{MOCK_CONFIG['username']}_{MOCK_DEVICE_ID}")}
+    )
+    mode_events = async_capture_events(hass, EVENT_MODE_CHANGED)
+    boost_events = async_capture_events(hass, EVENT_BOOST_ENDED)
+    low_events = async_capture_events(hass, EVENT_HOT_WATER_LOW)
+
+    mock_payloads["info"] = (
+        b'{"currentMode": {"type": "boost"},'
+        b' "records": [{"type": "boost", "state": "ongoing"}]}'
+    )
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert [event.data for event in mode_events] == [
+        {
+            "device_id": device.id,
+            "aquanta_id": MOCK_DEVICE_ID,
+            "old_value": "intelligence",
+            "new_value": "boost",
+        }
+    ]
+    assert not boost_events
+
+    mock_payloads["info"] = (
+        b'{"currentMode": {"type": "intelligence"},'
+        b' "records": [{"type": "boost", "state": "ended"}]}'
+    )
+    mock_payloads["water"] = b'{"temperature": 45.0, "available": 0.2}'
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert len(mode_events) == 2
+    assert [(e.data["old_value"], e.data["new_value"]) for e in boost_events] == [
+        (True, False)
+    ]
+    assert [(e.data["old_value"], e.data["new_value"]) for e in low_events] == [
+        (84.0, 20.0)
+    ]
+
+    # Staying low does not fire again
+    mock_payloads["water"] = b'{"temperature": 44.0, "available": 0.1}'
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert len(low_events) == 1
+    assert len(mode_events) == 2
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_failing_device_degrades_alone(hass, freezer):
+    """Test that one failing device goes stale without affecting the others."""
+    cloud = MockAquantaCloud(1, 2)
+    healthy, failing = cloud.device_ids(0)
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=cloud.entry_data(0),
+        options={CONF_STALE_GRACE: 5},
+        unique_id=cloud.username(0),
+    )
+    config_entry.add_to_hass(hass)
+
+    def state(device):
+        return hass.states.get(f"sensor.water_heater_{device}_mode").state
+
+    with requests_mock.Mocker() as mocker:
+        cloud.register(mocker)
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][config_entry.entry_id]
+        old_device = coordinator.data["devices"][failing]
+
+        # Within the grace period the failing device keeps its last data
+        cloud.failing.add(failing)
+        cloud.advance()
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        assert coordinator.last_update_success
+        assert coordinator.data["devices"][failing] is old_device
+        assert coordinator.data["devices"][healthy]["water"] == cloud.payload(
+            healthy, "water"
+        )
+        assert state(failing) != STATE_UNAVAILABLE
+
+        # Past it, only the failing device becomes unavailable
+        freezer.tick(timedelta(minutes=5))
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        assert state(failing) == STATE_UNAVAILABLE
+        assert state(healthy) != STATE_UNAVAILABLE
+        assert set(coordinator.endpoint_failures()) == {
+            (failing, key) for key in ("water", "info", "advanced")
+        }
+
+        cloud.failing.clear()
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        assert state(failing) != STATE_UNAVAILABLE
+        assert not coordinator.endpoint_failures()
+
+        assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_hanging_device_degrades_alone(hass):
+    """Test that a device whose requests time out does not fail the refresh."""
+    cloud = MockAquantaCloud(1, 2)
+    healthy, hanging = cloud.device_ids(0)
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=cloud.entry_data(0),
+        options={CONF_STALE_GRACE: 0},
+        unique_id=cloud.username(0),
+    )
+    config_entry.add_to_hass(hass)
+
+    def state(device):
+        return hass.states.get(f"sensor.water_heater_{device}_mode").state
+
+    # Scaled down so a hung device would run past a fixed account timeout
+    with (
+        requests_mock.Mocker() as mocker,
+        patch("custom_components.aquanta.coordinator.REQUEST_TIMEOUT", 0.2),
+        patch("custom_components.aquanta.coordinator.DEVICE_FETCH_DEADLINE", 0.1),
+        patch("custom_components.aquanta.coordinator.REFRESH_TIMEOUT", 0.3),
+    ):
+        cloud.register(mocker)
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+        cloud.hanging.add(hanging)
+        cloud.hang = 0.2
+        cloud.advance()
+        requests = cloud.requests
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+        assert coordinator.last_update_success
+        assert coordinator.data["devices"][healthy]["water"] == cloud.payload(
+            healthy, "water"
+        )
+        assert state(healthy) != STATE_UNAVAILABLE
+        assert state(hanging) == STATE_UNAVAILABLE
+        assert set(coordinator.endpoint_failures()) == {
+            (hanging, key) for key in ("water", "info", "advanced")
+        }
+        # The healthy device's endpoints and a single timed out request
+        assert cloud.requests - requests == 4
+
+        cloud.hanging.clear()
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        assert state(hanging) != STATE_UNAVAILABLE
+
+        assert await hass.config_entries.async_unload(config_entry.entry_id)
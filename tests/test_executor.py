@@ -0,0 +1,24 @@
+"""Test the aquanta worker pool."""
+
+import threading
+
+from custom_components.aquanta.executor import AquantaExecutor
+
+
+async def test_run_and_shutdown(hass):
+    """Test that jobs run on the dedicated pool and metrics are recorded."""
+    executor = AquantaExecutor(hass, max_workers=1)
+
+    name = await executor.async_run(lambda: threading.current_thread().name)
+    assert name.startswith("aquanta")
+
+    stats = executor.stats()
+    assert stats["jobs"] == 1
+    assert stats["queued"] == 0
+    assert stats["max_queued"] == 1
+    assert stats["wait_avg"] is not None
+
+    await executor.async_shutdown()
+    assert not any(
+        thread.name.startswith("aquanta") for thread in threading.enumerate()
+    )
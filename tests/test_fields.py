@@ -0,0 +1,170 @@
+"""Test the aquanta field registry and the entities built from it."""
+
+from datetime import timedelta
+import json
+
+from homeassistant.const import STATE_OFF, STATE_ON, STATE_UNAVAILABLE
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.aquanta.const import CONF_STALE_GRACE, DOMAIN
+from custom_components.aquanta.fields import (
+    COMPILED_FIELDS,
+    FIELDS,
+    AquantaField,
+    _endpoint_projections,
+    decode,
+)
+
+from .const import MOCK_CONFIG
+
+
+def test_requires_gates_value():
+    """Test that a falsy dependency returns the field default."""
+    device = {
+        "advanced": {
+            "controlEnabled": False,
+            "intelEnabled": True,
+            "thermostatEnabled": True,
+            "setPoint": 54.4,
+        }
+    }
+
+    assert COMPILED_FIELDS["intelligence_enabled"].value(device) is False
+    assert COMPILED_FIELDS["set_point"].value(device) == 54.4
+    assert COMPILED_FIELDS["set_point"].endpoints == {"advanced"}
+
+
+async def test_entity_states(hass, bypass_get_data):
+    """Test the states of the entities generated from the registry."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.water_heater_temperature").state == "52.5"
+    assert hass.states.get("sensor.water_heater_set_point").state == "54.4"
+    assert hass.states.get("sensor.water_heater_hot_water_available").state == "84.0"
+    assert hass.states.get("sensor.water_heater_mode").state == "intelligence"
+    assert (
+        hass.states.get("binary_sensor.water_heater_control_enabled").state == STATE_ON
+    )
+    assert (
+        hass.states.get("binary_sensor.water_heater_timer_enabled").state == STATE_OFF
+    )
+    assert hass.states.get("switch.water_heater_away").state == STATE_OFF
+    assert hass.states.get("water_heater.water_heater_water_heater").state == "eco"
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+def test_decode_keeps_only_read_values():
+    """Test that decoding drops the keys and records no field reads."""
+    raw = json.dumps(
+        {
+            "title": "Water Heater",
+            "currentMode": {"type": "boost", "start": "2024-01-01T00:00:00.000Z"},
+            "records": [
+                {"type": "boost", "state": "ongoing", "details": "x" * 100},
+                *({"type": "away", "state": "ended"} for _ in range(1000)),
+            ],
+            "usage": list(range(1000)),
+        }
+    ).encode()
+
+    assert decode("info", raw) == {
+        "title": "Water Heater",
+        "currentMode": {"type": "boost", "start": "2024-01-01T00:00:00.000Z"},
+        "records": [{"type": "boost", "state": "ongoing"}],
+    }
+
+
+def test_projection_needs_every_reader():
+    """Test that a key read whole by one field is not projected for the others."""
+    assert set(_endpoint_projections(FIELDS)["info"]) == {"records"}
+
+    reader = AquantaField(key="records", endpoint="info", path=("records",))
+    assert "info" not in _endpoint_projections((*FIELDS, reader))
+
+    reader = AquantaField(key="records", endpoint="info", uses=("records",))
+    assert "info" not in _endpoint_projections((*FIELDS, reader))
+
+
+async def test_sensor_write_limits(hass, bypass_get_data, mock_payloads, freezer):
+    """Test the deadband, minimum and maximum write intervals of a sensor."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    entity_id = "sensor.water_heater_temperature"
+
+    async def refresh(temperature: float, minutes: float) -> str:
+        freezer.tick(timedelta(minutes=minutes))
+        mock_payloads["water"] = json.dumps(
+            {"temperature": temperature, "available": 0.84}
+        ).encode()
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        return hass.states.get(entity_id).state
+
+    # Within the deadband
+    assert await refresh(52.7, 3) == "52.5"
+    # Outside the deadband
+    assert await refresh(53.5, 1) == "53.5"
+    # Too soon after the last write, so it is deferred to the end of the interval
+    assert await refresh(55.0, 1) == "53.5"
+    freezer.tick(timedelta(minutes=1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == "55.0"
+    # Heartbeat writes the drifted value once the maximum interval has passed
+    assert await refresh(55.2, 10) == "55.0"
+    freezer.tick(timedelta(minutes=20))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == "55.2"
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_sensor_availability_written_immediately(
+    hass, bypass_get_data, mock_payloads, freezer
+):
+    """Test that availability changes skip the minimum write interval."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=MOCK_CONFIG,
+        options={CONF_STALE_GRACE: 0},
+        entry_id="test",
+    )
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    entity_id = "sensor.water_heater_temperature"
+
+    freezer.tick(timedelta(minutes=3))
+    mock_payloads["water"] = b'{"temperature": 60.0, "available": 0.84}'
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == "60.0"
+
+    def fetch(aquanta_id, key):
+        if key == "water":
+            raise RuntimeError("Aquanta: Failed to GET water")
+        return mock_payloads[key]
+
+    # Within the minimum interval of the last write
+    freezer.tick(timedelta(minutes=1))
+    bypass_get_data.side_effect = fetch
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == STATE_UNAVAILABLE
+
+    bypass_get_data.side_effect = lambda aquanta_id, key: mock_payloads[key]
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == "60.0"
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
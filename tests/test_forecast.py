@@ -0,0 +1,121 @@
+"""Test the aquanta hot water demand forecaster."""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from homeassistant.core import State
+import numpy as np
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.aquanta.const import CONF_AUTO_BOOST, DOMAIN
+from custom_components.aquanta.forecast import DemandProfile, history_samples
+
+from .common import DAY, HOUR, MONDAY, morning_showers
+from .const import MOCK_CONFIG, MOCK_DEVICE_ID
+
+
+def test_forecast_from_offline_fit():
+    """Test that a fitted profile predicts the morning shortfall."""
+    profile = DemandProfile.fit(*morning_showers(14))
+    today = MONDAY + 14 * DAY
+
+    # Starting at 60% at 6:30, the draw from 7:00 hits 25% at 7:52:30
+    shortfall = profile.shortfall(today + 6.5 * HOUR, 60)
+    assert abs(shortfall - (today + 7.875 * HOUR)) < 60
+
+    # A full tank lasts through the morning
+    assert profile.shortfall(today + 6.5 * HOUR, 90) is None
+
+    # Already below the threshold
+    assert profile.shortfall(today, 20) == today
+
+
+def test_incremental_refit_matches_batch():
+    """Test that refitting in batches learns the same rates as one fit."""
+    times, values = morning_showers(3)
+    batch = DemandProfile.fit(times, values)
+
+    incremental = DemandProfile()
+    for start in range(0, len(times), 12):
+        for time, value in zip(times[start : start + 12], values[start : start + 12]):
+            incremental.add_sample(time, value)
+        incremental.refit()
+
+    # Only the decay of older batches sets them apart
+    np.testing.assert_allclose(incremental.rates(), batch.rates(), atol=1e-6)
+    assert 0.9 * batch.seconds.sum() < incremental.seconds.sum() < batch.seconds.sum()
+
+
+def test_too_little_history():
+    """Test that nothing is predicted before a day has been observed."""
+    profile = DemandProfile.fit(*morning_showers(14))
+    assert DemandProfile().shortfall(MONDAY, 60) is None
+    restored = DemandProfile(**profile.as_dict())
+    np.testing.assert_allclose(restored.rates(), profile.rates(), atol=1e-6)
+
+
+def test_history_samples_hold_values():
+    """Test that recorded states are held until the next one."""
+    start = datetime.fromtimestamp(MONDAY, timezone.utc)
+    states = [
+        State("sensor.test", "90.0", last_changed=start),
+        State("sensor.test", "50.0", last_changed=start + timedelta(seconds=150)),
+        State("sensor.test", "unavailable", last_changed=start + timedelta(minutes=5)),
+        State("sensor.test", "70.0", last_changed=start + timedelta(minutes=6)),
+    ]
+
+    times, values = history_samples(states, MONDAY + 8 * 60)
+
+    # The unavailable sample at 300 is left out
+    assert (times - MONDAY).tolist() == [0, 60, 120, 150, 180, 240, 360, 420]
+    assert values.tolist() == [90, 90, 90, 50, 50, 50, 70, 70]
+
+
+async def test_shortfall_sensor_and_auto_boost(
+    hass, bypass_get_data, mock_payloads, freezer, hass_storage
+):
+    """Test that a predicted shortfall is shown and boosted ahead of."""
+    hass.config.set_time_zone("UTC")
+    today = MONDAY + 14 * DAY
+    freezer.move_to(datetime.fromtimestamp(today + 6.75 * HOUR, timezone.utc))
+    hass_storage["aquanta.forecast.test"] = {
+        "version": 1,
+        "key": "aquanta.forecast.test",
+        "data": {
+            "devices": {
+                str(MOCK_DEVICE_ID): DemandProfile.fit(*morning_showers(14)).as_dict()
+            }
+        },
+    }
+    mock_payloads["water"] = b'{"temperature": 50.0, "available": 0.35}'
+
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=MOCK_CONFIG,
+        options={CONF_AUTO_BOOST: True},
+        entry_id="test",
+    )
+    config_entry.add_to_hass(hass)
+    with patch(
+        "custom_components.aquanta.api.AquantaApiClient.set_boost"
+    ) as mock_set_boost:
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+
+    # 35% at 6:45 runs below 25% at 7:15
+    state = hass.states.get("sensor.water_heater_predicted_hot_water_shortfall")
+    assert state.state == "2026-11-02T07:15:00+00:00"
+
+    mock_set_boost.assert_called_once()
+    assert mock_set_boost.call_args.args[0] == MOCK_DEVICE_ID
+
+    # Not boosted again within the cooldown
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    with patch(
+        "custom_components.aquanta.api.AquantaApiClient.set_boost"
+    ) as mock_set_boost:
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+    mock_set_boost.assert_not_called()
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
@@ -0,0 +1,73 @@
+"""Test seeding the aquanta forecaster from recorder history."""
+
+import asyncio
+from datetime import datetime, timezone
+
+from freezegun import freeze_time
+from homeassistant.const import CONF_USERNAME
+from homeassistant.helpers import entity_registry as er
+import homeassistant.util.dt as dt_util
+import numpy as np
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from custom_components.aquanta.const import DOMAIN
+
+from .common import DAY, HOUR, morning_showers
+from .const import MOCK_CONFIG, MOCK_DEVICE_ID
+
+
+# The recorder has to be set up before hass, which enabling custom
+# integrations sets up, so these tests enable both in that order. The
+# recorder's timers spin on a frozen clock, so time is only frozen to write
+# past states.
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(recorder_mock, enable_custom_integrations):
+    """Enable custom integrations, with a recorder."""
+    yield
+
+
+async def test_profile_seeded_from_history(hass, bypass_get_data):
+    """Test that a device without a profile is fitted to its sensor history."""
+    hass.config.set_time_zone("UTC")
+    entity_id = (
+        er.async_get(hass)
+        .async_get_or_create(
+            "sensor",
+            DOMAIN,
+            f"{MOCK_CONFIG[CONF_USERNAME]}_{MOCK_DEVICE_ID}_hot_water_available",
+            suggested_object_id="water_heater_hot_water_available",
+        )
+        .entity_id
+    )
+
+    # Morning showers since the day before yesterday, recorded as the
+    # sensor's state changes
+    now = dt_util.utcnow().timestamp()
+    today = now // DAY * DAY
+    times, values = morning_showers(3, today - 2 * DAY)
+    changed = np.flatnonzero(np.diff(values, prepend=np.nan) != 0)
+    changed = changed[times[changed] < now]
+    for time, value in zip(times[changed], values[changed]):
+        with freeze_time(datetime.fromtimestamp(time, timezone.utc)):
+            hass.states.async_set(entity_id, str(round(value, 1)))
+    await async_wait_recording_done(hass)
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    await asyncio.gather(*config_entry._background_tasks)
+
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    profile = coordinator.forecaster._profiles[str(MOCK_DEVICE_ID)]
+
+    # Learned from history alone: 60% at 6:30 runs below 25% at 7:52:30,
+    # give or take today's shower if it is still running
+    shortfall = profile.shortfall(today + 6.5 * HOUR, 60)
+    assert abs(shortfall - (today + 7.875 * HOUR)) < 300
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
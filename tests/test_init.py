@@ -1,7 +1,18 @@
 """Test aquanta setup process."""
+import gc
+import os
+import threading
+import time
+import tracemalloc
+from unittest.mock import Mock, patch
+
+from homeassistant.config_entries import SOURCE_REAUTH, ConfigEntryState
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.storage import Store
 import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
+import requests_mock
 
 from custom_components.aquanta import (
     async_reload_entry,
@@ -9,10 +20,14 @@ from custom_components.aquanta import (
     async_unload_entry,
 )
 from custom_components.aquanta.coordinator import AquantaCoordinator
-from custom_components.aquanta.const import DOMAIN
+from custom_components.aquanta.executor import AquantaExecutor
+from custom_components.aquanta.const import DATA_SESSIONS, DOMAIN
 
+from .common import MockAquantaCloud
 from .const import MOCK_CONFIG
 
+RELOADS = 10
+
 
 # We can pass fixtures as defined in conftest.py to tell pytest to use the fixture
 # for a given test. We can also leverage fixtures and mocks that are available in
@@ -23,10 +38,11 @@ async def test_setup_unload_and_reload_entry(hass, bypass_get_data):
     """Test entry setup and unload."""
     # Create a mock entry so we don't have to go through config flow
     config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
 
     # Set up the entry and assert that the values set during setup are where we expect
     # them to be.1
-    assert await async_setup_entry(hass, config_entry)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
     assert DOMAIN in hass.data and config_entry.entry_id in hass.data[DOMAIN]
     assert type(hass.data[DOMAIN][config_entry.entry_id]) == AquantaCoordinator
 
@@ -43,9 +59,156 @@ async def test_setup_unload_and_reload_entry(hass, bypass_get_data):
 async def test_setup_entry_exception(hass, error_on_get_data):
     """Test ConfigEntryNotReady when API raises an exception during entry setup."""
     config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
 
     # In this case we are testing the condition where async_setup_entry raises
     # ConfigEntryNotReady using the `error_on_get_data` fixture which simulates
     # an error.
     with pytest.raises(ConfigEntryNotReady):
         assert await async_setup_entry(hass, config_entry)
+
+
+async def test_setup_reuses_flow_session(hass, bypass_get_data):
+    """Test that entry setup reuses the session logged in by the config flow."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    session = Mock()
+    hass.data[DATA_SESSIONS] = {MOCK_CONFIG[CONF_USERNAME]: session}
+
+    with patch("custom_components.aquanta.Aquanta") as mock_aquanta:
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+
+    mock_aquanta.assert_not_called()
+    assert hass.data[DOMAIN][config_entry.entry_id].aquanta is session
+    assert hass.data[DATA_SESSIONS] == {}
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_reauth_costs_one_login(hass):
+    """Test that the entry reloaded by reauth uses the flow's session."""
+    cloud = MockAquantaCloud(1, 1)
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={**cloud.entry_data(0), CONF_PASSWORD: "old_password"},
+        unique_id=cloud.username(0),
+    )
+    config_entry.add_to_hass(hass)
+
+    with requests_mock.Mocker() as mocker:
+        cloud.register(mocker)
+        assert not await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+        assert config_entry.state is ConfigEntryState.SETUP_ERROR
+
+        (flow,) = (
+            flow
+            for flow in hass.config_entries.flow.async_progress()
+            if flow["context"]["source"] == SOURCE_REAUTH
+        )
+        result = await hass.config_entries.flow.async_configure(
+            flow["flow_id"], user_input=cloud.entry_data(0)
+        )
+        await hass.async_block_till_done()
+
+        assert result["reason"] == "reauth_successful"
+        assert config_entry.state is ConfigEntryState.LOADED
+        assert cloud.logins == 1
+        assert hass.data[DATA_SESSIONS] == {}
+
+        assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_unload_stops_hanging_fetch(hass):
+    """Test that unloading does not wait for a fetch to walk every endpoint."""
+    cloud = MockAquantaCloud(1, 2)
+    config_entry = MockConfigEntry(
+        domain=DOMAIN, data=cloud.entry_data(0), unique_id=cloud.username(0)
+    )
+    config_entry.add_to_hass(hass)
+
+    with (
+        requests_mock.Mocker() as mocker,
+        patch.object(
+            AquantaExecutor,
+            "async_shutdown",
+            autospec=True,
+            side_effect=AquantaExecutor.async_shutdown,
+        ) as mock_shutdown,
+    ):
+        cloud.register(mocker)
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+        # Every endpoint of both devices hangs, well inside the deadlines
+        cloud.hanging.update(cloud.device_ids(0))
+        cloud.hang = 0.3
+        requests = cloud.requests
+        refresh = hass.async_create_task(coordinator.async_refresh())
+        await hass.async_add_executor_job(threading.Event().wait, 0.1)
+
+        start = time.monotonic()
+        assert await hass.config_entries.async_unload(config_entry.entry_id)
+        await hass.async_block_till_done()
+
+        assert time.monotonic() - start < 1
+        assert refresh.done()
+        # Only the request in flight at shutdown was made
+        assert cloud.requests - requests == 1
+        # The entry's own unload callback found it already shut down
+        mock_shutdown.assert_called_once()
+
+
+def open_sockets() -> int:
+    """Return the number of sockets this process has open."""
+    return sum(
+        os.readlink(f"/proc/self/fd/{fd}").startswith("socket:")
+        for fd in os.listdir("/proc/self/fd")
+        if os.path.exists(f"/proc/self/fd/{fd}")
+    )
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="Needs procfs")
+async def test_reloads_do_not_leak(hass, socket_enabled):
+    """Test that repeated reloads leave sockets, threads and memory flat."""
+    cloud = MockAquantaCloud(1, 2)
+    config_entry = MockConfigEntry(
+        domain=DOMAIN, data=cloud.entry_data(0), unique_id=cloud.username(0)
+    )
+    config_entry.add_to_hass(hass)
+
+    async def reload():
+        assert await hass.config_entries.async_reload(config_entry.entry_id)
+        await hass.async_block_till_done()
+        # Let the local server see closed connections before counting
+        await hass.async_add_executor_job(threading.Event().wait, 0.05)
+        # The mocked storage keeps every write in its call history
+        Store._async_write_data.reset_mock()
+
+    with cloud.serve():
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+
+        # Warm up while tracing, so first-use caches and the data each reload
+        # replaces are traced before measuring
+        tracemalloc.start()
+        await reload()
+        gc.collect()
+        sockets = open_sockets()
+        threads = threading.active_count()
+        memory = tracemalloc.get_traced_memory()[0]
+
+        for _ in range(RELOADS):
+            await reload()
+
+        gc.collect()
+        growth = tracemalloc.get_traced_memory()[0] - memory
+        tracemalloc.stop()
+
+        assert open_sockets() <= sockets
+        assert threading.active_count() <= threads
+        assert growth / RELOADS < 50 * 1024
+        assert cloud.logins == RELOADS + 2
+
+        assert await hass.config_entries.async_unload(config_entry.entry_id)
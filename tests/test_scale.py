@@ -0,0 +1,137 @@
+"""Scale test running many aquanta accounts and devices in one instance.
+
+The size of the run and the budgets it must stay within can be overridden
+with environment variables, e.g. ``AQUANTA_SCALE_ENTRIES=20 pytest
+tests/test_scale.py``.
+"""
+
+import asyncio
+import os
+import time
+import tracemalloc
+
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+import requests_mock
+
+# Import the platforms up front so import costs don't count against memory
+from custom_components.aquanta import (  # noqa: F401
+    binary_sensor,
+    sensor,
+    switch,
+    water_heater,
+)
+from custom_components.aquanta.const import DOMAIN
+
+from .common import MockAquantaCloud
+
+# Entities each device gets, from the platform descriptions
+ENTITIES_PER_DEVICE = (
+    len(sensor.ENTITY_DESCRIPTIONS)
+    + len(sensor.DUTY_CYCLE_DESCRIPTIONS)
+    + len([sensor.SHORTFALL_DESCRIPTION])
+    + len(binary_sensor.ENTITY_DESCRIPTIONS)
+    + len(switch.ENTITY_DESCRIPTIONS)
+    + 1  # The water heater
+)
+
+ENTRIES = int(os.environ.get("AQUANTA_SCALE_ENTRIES", 5))
+DEVICES = int(os.environ.get("AQUANTA_SCALE_DEVICES", 4))
+REFRESHES = int(os.environ.get("AQUANTA_SCALE_REFRESHES", 5))
+
+# Budgets
+SETUP_SECONDS = float(os.environ.get("AQUANTA_BUDGET_SETUP_SECONDS", 10))
+REFRESH_CPU_MS_PER_DEVICE = float(
+    os.environ.get("AQUANTA_BUDGET_REFRESH_CPU_MS_PER_DEVICE", 25)
+)
+LOOP_BLOCK_MS = float(os.environ.get("AQUANTA_BUDGET_LOOP_BLOCK_MS", 100))
+MEMORY_KB_PER_ENTITY = float(os.environ.get("AQUANTA_BUDGET_MEMORY_KB_PER_ENTITY", 80))
+
+
+class LoopMonitor:
+    """Measure the longest stretch the event loop was blocked for."""
+
+    def __init__(self, interval: float = 0.005) -> None:
+        """Initialize the monitor."""
+        self.interval = interval
+        self.max_block = 0.0
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            late = time.perf_counter() - start - self.interval
+            self.max_block = max(self.max_block, late)
+
+    def start(self) -> None:
+        """Start sampling the loop."""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling the loop."""
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+async def test_scale_within_budgets(hass):
+    """Test setup, refresh and memory costs of many accounts stay within budget."""
+    cloud = MockAquantaCloud(ENTRIES, DEVICES)
+    entries = []
+    for account in range(ENTRIES):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data=cloud.entry_data(account),
+            unique_id=cloud.username(account),
+        )
+        entry.add_to_hass(hass)
+        entries.append(entry)
+
+    # Asyncio debug mode captures a stack for every task and would dominate
+    hass.loop.set_debug(False)
+
+    with requests_mock.Mocker() as mocker:
+        cloud.register(mocker)
+
+        tracemalloc.start()
+        setup_start = time.perf_counter()
+        assert await async_setup_component(hass, DOMAIN, {})
+        await hass.async_block_till_done()
+        setup_time = time.perf_counter() - setup_start
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        coordinators = list(hass.data[DOMAIN].values())
+        entities = len(hass.states.async_all())
+        assert len(coordinators) == ENTRIES
+        assert entities == ENTRIES * DEVICES * ENTITIES_PER_DEVICE
+
+        monitor = LoopMonitor()
+        monitor.start()
+        cpu_start = time.process_time()
+        for _ in range(REFRESHES):
+            cloud.advance()
+            await asyncio.gather(
+                *(coordinator.async_refresh() for coordinator in coordinators)
+            )
+            await hass.async_block_till_done()
+        refresh_cpu = (time.process_time() - cpu_start) / REFRESHES
+        await monitor.stop()
+
+        for entry in entries:
+            assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+    results = {
+        "setup_seconds": setup_time,
+        "refresh_cpu_ms_per_device": refresh_cpu * 1000 / (ENTRIES * DEVICES),
+        "loop_block_ms": monitor.max_block * 1000,
+        "memory_kb_per_entity": memory / 1024 / entities,
+    }
+    print(f"aquanta scale {ENTRIES}x{DEVICES}: {results}")  # noqa: T201
+
+    assert cloud.logins == ENTRIES
+    assert results["setup_seconds"] < SETUP_SECONDS
+    assert results["refresh_cpu_ms_per_device"] < REFRESH_CPU_MS_PER_DEVICE
+    assert results["loop_block_ms"] < LOOP_BLOCK_MS
+    assert results["memory_kb_per_entity"] < MEMORY_KB_PER_ENTITY
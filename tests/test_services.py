@@ -0,0 +1,74 @@
+"""Test aquanta services."""
+
+import cProfile
+import pstats
+from unittest.mock import patch
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.aquanta.const import ATTR_CYCLES, DOMAIN, SERVICE_PROFILE
+
+from .const import MOCK_CONFIG
+
+
+async def test_profile_service(hass, bypass_get_data, tmp_path):
+    """Test that the profile service writes a profile after the requested cycles."""
+    hass.config.config_dir = str(tmp_path)
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    await hass.services.async_call(
+        DOMAIN, SERVICE_PROFILE, {ATTR_CYCLES: 2}, blocking=True
+    )
+    assert coordinator.profiler is not None
+
+    await coordinator.async_refresh()
+    assert coordinator.profiler is not None
+    await coordinator.async_refresh()
+    assert coordinator.profiler is None
+    await hass.async_block_till_done()
+
+    assert len(list(tmp_path.glob("aquanta_profile.*.prof"))) == 1
+    summary = next(tmp_path.glob("aquanta_profile.*.txt")).read_text()
+    assert "get_device_data" in summary
+    # The timeline and forecast updates are part of the profiled cycle
+    stats = pstats.Stats(str(next(tmp_path.glob("aquanta_profile.*.prof"))))
+    profiled = {(file, name) for file, _, name in stats.stats}
+    assert any(
+        file.endswith("timeline.py") and name == "async_update"
+        for file, name in profiled
+    )
+    assert any(
+        file.endswith("forecast.py") and name == "async_update"
+        for file, name in profiled
+    )
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_profile_service_with_other_profiler(hass, bypass_get_data, tmp_path):
+    """Test that refreshes keep working when the loop is already profiled."""
+    hass.config.config_dir = str(tmp_path)
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    await hass.services.async_call(
+        DOMAIN, SERVICE_PROFILE, {ATTR_CYCLES: 2}, blocking=True
+    )
+    with patch.object(
+        cProfile.Profile,
+        "enable",
+        side_effect=ValueError("Another profiling tool is already active"),
+    ):
+        await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert coordinator.profiler is None
+    await hass.async_block_till_done()
+    assert not list(tmp_path.glob("aquanta_profile.*"))
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
@@ -0,0 +1,137 @@
+"""Test the aquanta mode timeline and duty cycle sensors."""
+
+from datetime import timedelta
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.aquanta.const import DOMAIN
+from custom_components.aquanta.timeline import (
+    PRUNE_BATCH,
+    AquantaTimeline,
+    DeviceTimeline,
+)
+
+from .const import MOCK_CONFIG, MOCK_DEVICE_ID
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def test_duty_cycles_over_rolling_windows():
+    """Test that duty cycles follow the modes and expire with the window."""
+    timeline = DeviceTimeline()
+    timeline.advance(0, "intelligence")
+    for minute in range(1, 18 * 60):
+        timeline.advance(minute * 60, "intelligence")
+    for minute in range(18 * 60, 24 * 60 + 1):
+        timeline.advance(minute * 60, "boost")
+
+    assert timeline.duty_cycle("daily", "boost") == 25
+    assert timeline.duty_cycle("daily", "intelligence") == 75
+    assert timeline.runs == [[0, "intelligence"], [18 * HOUR, "boost"]]
+
+    # Twelve more hours of boost push most of the intelligence out of the day
+    for minute in range(24 * 60 + 1, 36 * 60 + 1):
+        timeline.advance(minute * 60, "boost")
+    assert round(timeline.duty_cycle("daily", "boost"), 6) == 75
+    assert round(timeline.duty_cycle("weekly", "boost"), 6) == 50
+
+
+def test_gaps_are_not_counted():
+    """Test that time without updates is left out of the duty cycles."""
+    timeline = DeviceTimeline()
+    timeline.advance(0, "away")
+    timeline.advance(600, "away")
+    timeline.advance(5 * HOUR, "off")
+    timeline.advance(5 * HOUR + 600, "off")
+
+    assert timeline.runs == [[0, "away"], [600, None], [5 * HOUR, "off"]]
+    assert timeline.duty_cycle("daily", "away") == 50
+    assert timeline.duty_cycle("daily", "off") == 50
+
+
+def test_saved_timeline_replays():
+    """Test that a timeline rebuilt from storage has the same duty cycles."""
+    timeline = DeviceTimeline()
+    for step in range(0, 3 * DAY, 600):
+        timeline.advance(step, "boost" if step % (4 * HOUR) < HOUR else "away")
+
+    saved = timeline.as_dict()
+    restored = DeviceTimeline(saved["runs"], saved["updated"])
+    for window in ("daily", "weekly"):
+        for mode in ("boost", "away"):
+            assert restored.duty_cycle(window, mode) == timeline.duty_cycle(
+                window, mode
+            )
+
+
+def test_old_runs_are_pruned():
+    """Test that runs older than every window are dropped."""
+    timeline = DeviceTimeline()
+    for step in range(0, 30 * DAY, 600):
+        timeline.advance(step, "boost" if step % (2 * HOUR) < HOUR else "away")
+
+    # Six mode changes a day are kept for a week, plus an unpruned batch
+    assert len(timeline.runs) <= 7 * 24 + PRUNE_BATCH + 1
+    assert round(timeline.duty_cycle("weekly", "boost"), 6) == 50
+
+
+async def test_failing_info_is_unknown(hass, freezer):
+    """Test that a device whose info endpoint fails is not kept in its mode."""
+    timeline = AquantaTimeline(hass, "test")
+    data = {"devices": {MOCK_DEVICE_ID: {"info": {"currentMode": {"type": "boost"}}}}}
+
+    timeline.async_update(data)
+    freezer.tick(timedelta(minutes=1))
+    timeline.async_update(data, {(MOCK_DEVICE_ID, "info")})
+    freezer.tick(timedelta(minutes=1))
+    timeline.async_update(data)
+
+    assert [mode for _, mode in timeline._devices[str(MOCK_DEVICE_ID)].runs] == [
+        "boost",
+        None,
+        "boost",
+    ]
+    # Only the minute the mode was known counts
+    assert timeline.duty_cycle(MOCK_DEVICE_ID, "daily", "boost") == 100
+    totals = timeline._devices[str(MOCK_DEVICE_ID)]._windows["daily"].totals
+    assert totals["boost"] == totals[None] == 60
+
+
+async def test_duty_cycle_sensors(
+    hass, bypass_get_data, mock_payloads, freezer, hass_storage
+):
+    """Test that duty cycle sensors update and the timeline is saved."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    entity_id = "sensor.water_heater_boost_duty_cycle_daily"
+    assert hass.states.get(entity_id).state == "unknown"
+
+    freezer.tick(timedelta(minutes=1))
+    await coordinator.async_refresh()
+    mock_payloads["info"] = (
+        b'{"currentMode": {"type": "boost"},'
+        b' "records": [{"type": "boost", "state": "ongoing"}]}'
+    )
+    freezer.tick(timedelta(minutes=1))
+    await coordinator.async_refresh()
+    freezer.tick(timedelta(minutes=2))
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert hass.states.get(entity_id).state == "50.0"
+    assert (
+        hass.states.get("sensor.water_heater_intelligence_duty_cycle_weekly").state
+        == "50.0"
+    )
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    saved = hass_storage["aquanta.timeline.test"]["data"]["devices"]
+    assert [mode for _, mode in saved[str(MOCK_DEVICE_ID)]["runs"]] == [
+        "intelligence",
+        "boost",
+    ]
@@ -0,0 +1,184 @@
+"""Test the aquanta water heater."""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.components.water_heater import (
+    ATTR_MAX_TEMP,
+    ATTR_MIN_TEMP,
+    ATTR_TEMPERATURE,
+    DOMAIN as WATER_HEATER_DOMAIN,
+    SERVICE_SET_TEMPERATURE,
+    WaterHeaterEntityFeature,
+)
+from homeassistant.const import ATTR_ENTITY_ID, ATTR_SUPPORTED_FEATURES
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.util.dt as dt_util
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.aquanta.const import (
+    CONF_SET_POINT_CONTROL,
+    DOMAIN,
+    SET_POINT_COOLDOWN,
+)
+
+from .const import MOCK_CONFIG, MOCK_DEVICE_ID
+
+ENTITY_ID = "water_heater.water_heater_water_heater"
+
+
+async def test_set_temperature_is_debounced(hass, bypass_get_data, mock_payloads):
+    """Test that a burst of set points sends only the final one."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=MOCK_CONFIG,
+        options={CONF_SET_POINT_CONTROL: True},
+        entry_id="test",
+    )
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    def set_set_point(aquanta_id, value):
+        mock_payloads["advanced"] = mock_payloads["advanced"].replace(
+            b"54.4", str(value).encode()
+        )
+
+    with patch(
+        "custom_components.aquanta.api.AquantaApiClient.set_set_point",
+        side_effect=set_set_point,
+    ) as mock_set:
+        for temperature in (55, 56, 57):
+            await hass.services.async_call(
+                WATER_HEATER_DOMAIN,
+                SERVICE_SET_TEMPERATURE,
+                {ATTR_ENTITY_ID: ENTITY_ID, ATTR_TEMPERATURE: temperature},
+                blocking=True,
+            )
+
+        # Applied optimistically, but nothing sent yet
+        assert hass.states.get(ENTITY_ID).attributes[ATTR_TEMPERATURE] == 57
+        mock_set.assert_not_called()
+
+        bypass_get_data.reset_mock()
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + timedelta(seconds=SET_POINT_COOLDOWN + 1)
+        )
+        await hass.async_block_till_done()
+
+    mock_set.assert_called_once_with(MOCK_DEVICE_ID, 57)
+    assert [call.args for call in bypass_get_data.call_args_list] == [
+        (MOCK_DEVICE_ID, "advanced")
+    ]
+    assert hass.states.get(ENTITY_ID).attributes[ATTR_TEMPERATURE] == 57
+    assert hass.states.get("sensor.water_heater_set_point").state == "57.0"
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_set_temperature_failure_reverts(hass, bypass_get_data):
+    """Test that a rejected set point falls back to the reported one."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=MOCK_CONFIG,
+        options={CONF_SET_POINT_CONTROL: True},
+        entry_id="test",
+    )
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    with patch(
+        "custom_components.aquanta.api.AquantaApiClient.set_set_point",
+        side_effect=RuntimeError("Aquanta: Failed to PUT"),
+    ):
+        await hass.services.async_call(
+            WATER_HEATER_DOMAIN,
+            SERVICE_SET_TEMPERATURE,
+            {ATTR_ENTITY_ID: ENTITY_ID, ATTR_TEMPERATURE: 58},
+            blocking=True,
+        )
+        assert hass.states.get(ENTITY_ID).attributes[ATTR_TEMPERATURE] == 58
+
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + timedelta(seconds=SET_POINT_COOLDOWN + 1)
+        )
+        await hass.async_block_till_done()
+
+    assert hass.states.get(ENTITY_ID).attributes[ATTR_TEMPERATURE] == 54.4
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_unconfirmed_set_temperature_reverts(hass, bypass_get_data):
+    """Test that a set point the device does not report is not kept."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=MOCK_CONFIG,
+        options={CONF_SET_POINT_CONTROL: True},
+        entry_id="test",
+    )
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    # Accepted, but the device keeps reporting its old set point
+    with patch(
+        "custom_components.aquanta.api.AquantaApiClient.set_set_point"
+    ) as mock_set:
+        await hass.services.async_call(
+            WATER_HEATER_DOMAIN,
+            SERVICE_SET_TEMPERATURE,
+            {ATTR_ENTITY_ID: ENTITY_ID, ATTR_TEMPERATURE: 58},
+            blocking=True,
+        )
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + timedelta(seconds=SET_POINT_COOLDOWN + 1)
+        )
+        await hass.async_block_till_done()
+
+    mock_set.assert_called_once_with(MOCK_DEVICE_ID, 58)
+    assert hass.states.get(ENTITY_ID).attributes[ATTR_TEMPERATURE] == 54.4
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_set_temperature_needs_option(hass, bypass_get_data):
+    """Test that the set point can only be changed once the option is on."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    attributes = hass.states.get(ENTITY_ID).attributes
+    assert not (
+        attributes[ATTR_SUPPORTED_FEATURES]
+        & WaterHeaterEntityFeature.TARGET_TEMPERATURE
+    )
+    assert attributes[ATTR_MIN_TEMP] == 43.5
+    assert attributes[ATTR_MAX_TEMP] == 60.0
+
+    # The service is available whatever the supported features say
+    with patch(
+        "custom_components.aquanta.api.AquantaApiClient.set_set_point"
+    ) as mock_set:
+        with pytest.raises(ServiceValidationError):
+            await hass.services.async_call(
+                WATER_HEATER_DOMAIN,
+                SERVICE_SET_TEMPERATURE,
+                {ATTR_ENTITY_ID: ENTITY_ID, ATTR_TEMPERATURE: 58},
+                blocking=True,
+            )
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + timedelta(seconds=SET_POINT_COOLDOWN + 1)
+        )
+        await hass.async_block_till_done()
+
+    mock_set.assert_not_called()
+    assert hass.states.get(ENTITY_ID).attributes[ATTR_TEMPERATURE] == 54.4
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)